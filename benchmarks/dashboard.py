@@ -0,0 +1,317 @@
+# Headless timings for every stage of show_dashboard, run on synthetic uploads
+#
+#   python -m benchmarks.dashboard --sizes 10000 100000 1000000 10000000
+#   python -m benchmarks.dashboard --label after --compare benchmarks/results/before.json
+#
+# Each stage calls the same modules the dashboard uses (no Streamlit runtime),
+# with one typical sidebar selection: every state, the last 90 days, High and
+# Critical severity. Figures are serialized and maps rendered to HTML, since
+# that is the work Streamlit does before anything reaches the browser.
+# Synthetic CSVs are cached under benchmarks/data/, results are written to
+# benchmarks/results/<label>.json.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_csv
+from pothole_charts import report_trend, severity_pie, size_severity_heatmap, status_bar, top_states, top_users
+from pothole_cube import CountCube, UserActivity
+from pothole_dedupe import duplicate_groups, merge_duplicates
+from pothole_data import parse_timestamps, read_pothole_csv
+from pothole_exports import write_export
+from pothole_filters import FilterEngine
+from pothole_geo import boundary_index
+from pothole_map import build_cluster_map, build_density_map, build_pothole_map, fit_view, view_bounds
+from pothole_search import SearchIndex
+from pothole_spatial import SpatialIndex
+from pothole_table import DEFAULT_PAGE_SIZE, format_page, page_slice, restrict_order, sort_order
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEARCH_TERM = 'jalan ampang'
+TABLE_SORT_COLUMN = 'address'
+
+# Stage time ratio (current / baseline) reported as a regression; differences
+# under the noise floor are never flagged
+REGRESSION_RATIO = 1.25
+NOISE_FLOOR_SECONDS = 0.01
+
+
+def dataset_path(n, seed):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"potholes_{n}_s{seed}.csv")
+    if not os.path.exists(path):
+        write_synthetic_csv(path, n, seed=seed, invalid_rate=0.0005)
+    return path
+
+
+def typical_filters(df):
+    last_day = df['date_detected'].max()
+    return dict(
+        state=None,
+        start_date=(last_day - pd.Timedelta(days=89)).date(),
+        end_date=last_day.date(),
+        severities=['High', 'Critical'],
+        statuses=list(df['status'].cat.categories),
+        sizes=list(df['size'].cat.categories),
+    )
+
+
+def render_map(m):
+    return m.get_root().render()
+
+
+# (stage, function of the shared state dict); each stores what later stages need
+def load(state):
+    with open(state['path'], 'rb') as source:
+        state['df'], state['rejected'] = read_pothole_csv(source)
+
+
+def read_raw(state):
+    state['raw'] = pd.read_csv(state['path'], dtype=str)
+
+
+def parse_dates(state):
+    raw = state.pop('raw')
+    parse_timestamps(raw['date_detected'], raw['time_detected'])
+
+
+def filter_index(state):
+    state['engine'] = FilterEngine(state['df'])
+    state['filters'] = typical_filters(state['df'])
+
+
+def apply_filters(state):
+    state['selection'] = state['engine'].select(**state['filters'])
+    state['filtered'] = state['selection'].take(state['df'])
+
+
+def build_cube(state):
+    state['cube'] = CountCube(state['df'])
+
+
+def metrics(state):
+    summary = state['summary'] = state['cube'].select(**state['filters'])
+    state['metrics'] = (summary.total, summary.count_of('severity', 'Critical'), summary.count_of('status', 'New'),
+                        summary.count_of('status', 'Completed'), summary.distinct_users())
+
+
+def map_clusters(state):
+    center, zoom = fit_view(state['filtered'])
+    m, _ = build_cluster_map(state['filtered'], center, zoom)
+    render_map(m)
+
+
+def map_layer(state):
+    render_map(build_pothole_map(state['filtered'], mode='layer'))
+
+
+def map_density(state):
+    m, _ = build_density_map(state['filtered'], ('severity', 'size'))
+    render_map(m)
+
+
+def chart(build):
+    def stage(state):
+        fig = build(state['summary'])
+        if fig is not None:
+            fig.to_json()
+    return stage
+
+
+def chart_users(state):
+    if 'users' not in state:
+        state['users'] = UserActivity(state['df'])
+    top_users(state['users'].top(state['selection'], 10)).to_json()
+
+
+def search_index(state):
+    state['search'] = SearchIndex(state['df'])
+
+
+def search(state):
+    state['search'].search(SEARCH_TERM, state['selection'])
+
+
+def spatial_index(state):
+    state['spatial'] = SpatialIndex(state['df'])
+
+
+# Viewport box plus a 250 m radius and 10 nearest around the busiest state's centre
+def spatial_query(state):
+    center, zoom = fit_view(state['df'][state['df']['state'] == state['df']['state'].mode()[0]])
+    state['spatial'].bbox(view_bounds(center, zoom), state['selection'])
+    state['spatial'].within(center[0], center[1], 250, state['selection'])
+    state['spatial'].nearest(center[0], center[1], 10, state['selection'])
+
+
+def dedupe(state):
+    merge_duplicates(state['df'], duplicate_groups(state['df']))
+
+
+def locate_states(state):
+    boundary_index().check(state['df'])
+
+
+# One live-feed refresh where 1% of the reports changed: count cube and
+# filter bitmaps updated from the changed rows instead of rebuilt
+def live_update(state):
+    df = state['df']
+    replaced = np.random.default_rng(0).choice(len(df), max(len(df) // 100, 1), replace=False)
+    changed = df.take(replaced)
+    state['cube'].updated(changed, changed)
+    state['engine'].updated(df, replaced)
+
+
+def table_page(state):
+    order = sort_order(state['df'], TABLE_SORT_COLUMN)
+    rows = page_slice(restrict_order(order, selection=state['selection']), 1, DEFAULT_PAGE_SIZE)
+    format_page(state['df'].take(rows))
+
+
+def export(fmt):
+    def stage(state):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_export(state['df'], state['selection'].rows(), fmt, os.path.join(tmp, 'export'))
+    return stage
+
+
+STAGES = [
+    ('load', load),
+    ('read_csv', read_raw),
+    ('parse_dates', parse_dates),
+    ('filter_index', filter_index),
+    ('filter', apply_filters),
+    ('cube', build_cube),
+    ('metrics', metrics),
+    ('map_clusters', map_clusters),
+    ('map_layer', map_layer),
+    ('map_density', map_density),
+    ('chart_severity', chart(severity_pie)),
+    ('chart_status', chart(status_bar)),
+    ('chart_timeline', chart(report_trend)),
+    ('chart_states', chart(top_states)),
+    ('chart_heatmap', chart(size_severity_heatmap)),
+    ('chart_users', chart_users),
+    ('search_index', search_index),
+    ('search', search),
+    ('spatial_index', spatial_index),
+    ('spatial_query', spatial_query),
+    ('dedupe', dedupe),
+    ('locate_states', locate_states),
+    ('live_update', live_update),
+    ('table_page', table_page),
+    ('export_csv', export('csv')),
+    ('export_parquet', export('parquet')),
+]
+
+# Stages nothing else depends on (parse_dates needs read_csv)
+SKIPPABLE = ['read_csv', 'parse_dates', 'map_clusters', 'map_layer', 'map_density', 'chart_severity', 'chart_status',
+             'chart_timeline', 'chart_states', 'chart_heatmap', 'chart_users', 'search', 'spatial_query',
+             'dedupe', 'locate_states', 'live_update', 'table_page', 'export_csv', 'export_parquet']
+
+
+def run_size(n, seed=0, repeat=1, skip=()):
+    state = {'path': dataset_path(n, seed)}
+    results = []
+    if 'read_csv' in skip:
+        skip = set(skip) | {'parse_dates'}
+    for stage, run in STAGES:
+        if stage in skip:
+            continue
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(state)
+            timings.append(time.perf_counter() - start)
+        results.append({'rows': n, 'stage': stage, 'seconds': min(timings)})
+        print(f"{n:>10} {stage:>16} {min(timings):>10.3f}", flush=True)
+    return results
+
+
+def environment(label):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=BENCH_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'label': label,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(r['rows'], r['stage']): r['seconds'] for r in baseline['results']}
+    regressions = 0
+    print(f"\nvs {baseline['meta']['label']} ({baseline['meta'].get('commit') or 'unknown commit'})")
+    print(f"{'rows':>10} {'stage':>16} {'before':>10} {'after':>10} {'ratio':>7}")
+    for r in results:
+        old = before.get((r['rows'], r['stage']))
+        if old is None:
+            continue
+        ratio = r['seconds'] / old if old > 0 else float('inf')
+        flag = ''
+        if abs(r['seconds'] - old) < NOISE_FLOOR_SECONDS:
+            pass
+        elif ratio > REGRESSION_RATIO:
+            flag = '  slower'
+            regressions += 1
+        elif ratio < 1 / REGRESSION_RATIO:
+            flag = '  faster'
+        print(f"{r['rows']:>10} {r['stage']:>16} {old:>10.3f} {r['seconds']:>10.3f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each dashboard stage on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per stage; the fastest is kept")
+    parser.add_argument('--skip', nargs='*', default=[], choices=SKIPPABLE,
+                        help="Stages not to run (e.g. read_csv and map_layer at 10M rows)")
+    parser.add_argument('--label', default=None, help="Results file name (default: current commit)")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    meta = environment(args.label)
+    meta['label'] = args.label or meta['commit'] or datetime.now().strftime('%Y%m%d-%H%M%S')
+
+    print(f"{'rows':>10} {'stage':>16} {'seconds':>10}")
+    results = []
+    for n in args.sizes:
+        results.extend(run_size(n, seed=args.seed, repeat=args.repeat, skip=set(args.skip)))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{meta['label']}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"\nSaved {out_path}")
+
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions and args.fail_on_regression:
+            raise SystemExit(f"{regressions} stage(s) slower than {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
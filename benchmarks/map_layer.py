@@ -0,0 +1,45 @@
+# Map build benchmark: per-row folium.CircleMarker loop vs the single GeoJSON layer
+#
+#   python -m benchmarks.map_layer --sizes 10000 100000 1000000
+#
+# Build time covers constructing the folium map and rendering it to HTML (what
+# st_folium ships to the browser); payload is the size of that HTML.
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_frame
+from pothole_data import coerce_schema
+from pothole_map import build_pothole_map
+
+
+def synthetic_potholes(n, seed=0):
+    return coerce_schema(synthetic_frame(n, seed=seed))
+
+
+def time_build(df, mode):
+    start = time.perf_counter()
+    m = build_pothole_map(df, mode=mode)
+    html = m.get_root().render()
+    return time.perf_counter() - start, len(html.encode('utf-8'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the per-row marker map against the GeoJSON layer")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--markers-max', type=int, default=100_000,
+                        help="Skip the per-row marker loop above this many points")
+    args = parser.parse_args(argv)
+
+    print(f"{'points':>10} {'mode':>8} {'build (s)':>10} {'payload (MB)':>13}")
+    for n in args.sizes:
+        df = synthetic_potholes(n)
+        for mode in ('markers', 'layer'):
+            if mode == 'markers' and n > args.markers_max:
+                print(f"{n:>10} {mode:>8} {'skipped':>10} {'-':>13}")
+                continue
+            seconds, size = time_build(df, mode)
+            print(f"{n:>10} {mode:>8} {seconds:>10.2f} {size / 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Synthetic pothole reports in the 11-column upload schema
+#
+#   python -m benchmarks.synthetic --rows 1000000 --out potholes_1m.csv
+#
+# Points are clustered around towns inside each Malaysian state (weighted
+# roughly by road network size), severity and size are skewed towards minor
+# damage, report volume grows over the year and older reports are more likely
+# to be completed. Output is deterministic for a given seed and chunk size.
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from pothole_data import REQUIRED_COLUMNS
+
+# name: (latitude, longitude, spread in degrees, share of reports)
+STATES = {
+    'Selangor': (3.07, 101.52, 0.25, 0.20),
+    'Kuala Lumpur': (3.14, 101.69, 0.06, 0.12),
+    'Johor': (1.86, 103.35, 0.45, 0.12),
+    'Perak': (4.59, 101.09, 0.40, 0.08),
+    'Sabah': (5.55, 116.90, 0.60, 0.07),
+    'Sarawak': (2.50, 112.90, 1.00, 0.07),
+    'Penang': (5.38, 100.30, 0.08, 0.06),
+    'Kedah': (6.12, 100.58, 0.25, 0.06),
+    'Pahang': (3.80, 102.90, 0.60, 0.05),
+    'Kelantan': (5.60, 102.00, 0.30, 0.04),
+    'Negeri Sembilan': (2.73, 102.25, 0.20, 0.03),
+    'Melaka': (2.20, 102.25, 0.10, 0.03),
+    'Terengganu': (4.90, 103.00, 0.30, 0.03),
+    'Perlis': (6.45, 100.20, 0.06, 0.01),
+    'Putrajaya': (2.93, 101.69, 0.03, 0.005),
+    'Labuan': (5.30, 115.23, 0.03, 0.005),
+}
+TOWNS_PER_STATE = 6
+
+SIZE_MIX = {'Small': 0.45, 'Medium': 0.38, 'Large': 0.17}
+SEVERITY_MIX = {'Low': 0.38, 'Medium': 0.32, 'High': 0.20, 'Critical': 0.10}
+
+STREETS = ['Jalan Ampang', 'Jalan Tun Razak', 'Jalan Sultan Ismail', 'Jalan Bukit Bintang', 'Jalan Ipoh',
+           'Jalan Klang Lama', 'Jalan Cheras', 'Jalan Kuching', 'Jalan Pahang', 'Jalan Raja Laut',
+           'Jalan Tebrau', 'Jalan Skudai', 'Jalan Gurney', 'Jalan Air Itam', 'Jalan Penampang',
+           'Persiaran Surian', 'Lebuhraya Persekutuan', 'Jalan Besar', 'Jalan Masjid', 'Jalan Stesen']
+
+CHUNK_ROWS = 1_000_000
+
+
+def pick(rng, mix, n):
+    return np.asarray(list(mix))[rng.choice(len(mix), n, p=list(mix.values()))]
+
+
+def zero_padded(values, width):
+    return pd.Series(values).astype(str).str.zfill(width)
+
+
+# Town centres are fixed per seed so every chunk shares the same hotspots
+def town_centres(seed):
+    rng = np.random.default_rng([seed, 0])
+    centres = {}
+    for state, (lat, lon, spread, _) in STATES.items():
+        centres[state] = np.column_stack([rng.normal(lat, spread / 2, TOWNS_PER_STATE),
+                                          rng.normal(lon, spread / 2, TOWNS_PER_STATE)])
+    return centres
+
+
+def synthetic_frame(n, seed=0, start=0, days=365, end_date='2024-12-31', n_users=None, invalid_rate=0.0):
+    rng = np.random.default_rng([seed, 1, start])
+    centres = town_centres(seed)
+    names = list(STATES)
+    shares = np.array([STATES[name][3] for name in names])
+    state_idx = rng.choice(len(names), n, p=shares / shares.sum())
+
+    latitude = np.empty(n)
+    longitude = np.empty(n)
+    for i, name in enumerate(names):
+        rows = np.flatnonzero(state_idx == i)
+        town = rng.integers(0, TOWNS_PER_STATE, len(rows))
+        scale = STATES[name][2] / 6
+        latitude[rows] = centres[name][town, 0] + rng.normal(0, scale, len(rows))
+        longitude[rows] = centres[name][town, 1] + rng.normal(0, scale, len(rows))
+
+    # Report volume grows over the period (density rises linearly with time)
+    age = 1 - np.sqrt(rng.random(n))
+    day = np.minimum((age * days).astype(np.int64), days - 1)
+    dates = pd.Timestamp(end_date) - pd.to_timedelta(day, unit='D')
+    hours = np.clip(rng.normal(14, 4, n), 0, 23).astype(np.int64)
+    minutes = rng.integers(0, 60, n)
+
+    # Older reports are more likely to have been repaired
+    u = rng.random(n)
+    completed = 0.10 + 0.70 * age
+    status = np.where(u < completed, 'Completed', np.where(u < completed + 0.25, 'In Progress', 'New'))
+
+    # A few very active reporters and a long tail
+    n_users = n_users or max(100, n // 50)
+    users = (n_users * rng.random(n) ** 3).astype(np.int64)
+
+    df = pd.DataFrame({
+        'pothole_id': 'PH' + zero_padded(np.arange(start, start + n), 8),
+        'latitude': latitude.round(6),
+        'longitude': longitude.round(6),
+        'state': np.asarray(names)[state_idx],
+        'address': (pd.Series(np.asarray(STREETS)[rng.integers(0, len(STREETS), n)]) + ' '
+                    + pd.Series(rng.integers(1, 400, n)).astype(str)),
+        'size': pick(rng, SIZE_MIX, n),
+        'severity': pick(rng, SEVERITY_MIX, n),
+        'date_detected': dates.strftime('%Y-%m-%d'),
+        'time_detected': zero_padded(hours, 2) + ':' + zero_padded(minutes, 2),
+        'user_id': 'U' + pd.Series(1000 + users).astype(str),
+        'status': status,
+    }, columns=REQUIRED_COLUMNS)
+
+    # Optionally blank out a few coordinates to exercise the rejected-rows report
+    if invalid_rate:
+        bad = rng.random(n) < invalid_rate
+        df['latitude'] = df['latitude'].astype(object)
+        df.loc[bad, 'latitude'] = ''
+    return df
+
+
+def write_synthetic_csv(path, n, seed=0, chunk_rows=CHUNK_ROWS, invalid_rate=0.0):
+    n_users = max(100, n // 50)
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        for start in range(0, n, chunk_rows):
+            chunk = synthetic_frame(min(chunk_rows, n - start), seed=seed, start=start, n_users=n_users,
+                                    invalid_rate=invalid_rate)
+            chunk.to_csv(out, index=False, header=start == 0)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic pothole CSV")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--invalid-rate', type=float, default=0.0,
+                        help="Share of rows written with a blank latitude")
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args(argv)
+
+    path = args.out or f"potholes_{args.rows}.csv"
+    write_synthetic_csv(path, args.rows, seed=args.seed, invalid_rate=args.invalid_rate)
+    print(f"Wrote {args.rows:,} rows to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
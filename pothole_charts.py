@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Analytics tab figures, built from a CubeSlice (see pothole_cube) so they can
+# be rendered by the dashboard or timed headlessly by the benchmarks
+SEVERITY_COLORS = {
+    'Low': '#22c55e',
+    'Medium': '#f59e0b',
+    'High': '#ef4444',
+    'Critical': '#7f1d1d'
+}
+STATUS_COLORS = {
+    'New': '#ef4444',
+    'In Progress': '#f59e0b',
+    'Completed': '#22c55e'
+}
+
+
+def severity_pie(summary):
+    severity_counts = summary.count_by('severity')
+    fig = px.pie(
+        values=severity_counts.values,
+        names=severity_counts.index,
+        title="Distribution by Severity Level",
+        color_discrete_map=SEVERITY_COLORS
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+
+def status_bar(summary):
+    status_counts = summary.count_by('status')
+    fig = px.bar(
+        x=status_counts.values,
+        y=status_counts.index,
+        orientation='h',
+        title="Reports by Status",
+        color=status_counts.index,
+        color_discrete_map=STATUS_COLORS
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+# Report trend: resolution picked from the selected date span (or forced),
+# counts taken from the cube's per-day sums, long series thinned with LTTB and
+# drawn as WebGL traces
+TREND_RESOLUTIONS = {
+    'day': {'rule': None, 'title': "Daily"},
+    'week': {'rule': 'W-MON', 'title': "Weekly"},
+    'month': {'rule': 'MS', 'title': "Monthly"},
+}
+# Longest span (in days) shown at each resolution in auto mode
+TREND_AUTO_DAYS = {'day': 120, 'week': 730}
+TREND_MAX_POINTS = 500
+TREND_MARKER_POINTS = 60
+TREND_TOP_STATES = 8
+
+
+def trend_resolution(first, last):
+    span = (last - first).days
+    for resolution, max_days in TREND_AUTO_DAYS.items():
+        if span <= max_days:
+            return resolution
+    return 'month'
+
+
+# Indices of `threshold` points that keep the visual shape of y (Largest
+# Triangle Three Buckets, Steinarsson 2013). Points are assumed evenly spaced.
+def lttb(y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = (edges[i + 1] + edges[i + 2] - 1) / 2
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = n - 1, y[-1]
+        x = np.arange(lo, hi)
+        area = np.abs((a - next_x) * (y[lo:hi] - y[a]) - (a - x) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+# Counts per period for the selection, trimmed to its first and last report;
+# one column per breakdown level (or a single 'count' column)
+def trend_counts(summary, resolution='auto', breakdown=None):
+    if breakdown is None:
+        daily = summary.daily_counts()
+        if daily.empty:
+            return daily.to_frame(), 'day'
+        counts = daily.reindex(pd.date_range(daily.index[0], daily.index[-1], freq='D', name='date'),
+                               fill_value=0).to_frame()
+    else:
+        counts = summary.daily_counts_by(breakdown)
+        reported = np.flatnonzero(counts.to_numpy().sum(axis=1))
+        if not len(reported):
+            return counts.iloc[:0], 'day'
+        counts = counts.iloc[reported[0]:reported[-1] + 1]
+        if breakdown == 'state' and counts.shape[1] > TREND_TOP_STATES:
+            top = counts.sum().nlargest(TREND_TOP_STATES).index
+            other = counts.drop(columns=top).sum(axis=1)
+            counts = counts[top].assign(Other=other)
+
+    if resolution == 'auto':
+        resolution = trend_resolution(counts.index[0], counts.index[-1])
+    rule = TREND_RESOLUTIONS[resolution]['rule']
+    if rule is not None:
+        counts = counts.resample(rule, label='left', closed='left').sum()
+    return counts, resolution
+
+
+def report_trend(summary, resolution='auto', breakdown=None, max_points=TREND_MAX_POINTS):
+    counts, resolution = trend_counts(summary, resolution, breakdown)
+    colors = SEVERITY_COLORS if breakdown == 'severity' else {}
+    fig = go.Figure()
+    for column in counts.columns:
+        values = counts[column].to_numpy()
+        keep = lttb(values, max_points)
+        fig.add_trace(go.Scattergl(
+            x=counts.index[keep],
+            y=values[keep],
+            name=str(column),
+            mode='lines+markers' if len(keep) <= TREND_MARKER_POINTS else 'lines',
+            line=dict(color=colors.get(column)),
+            showlegend=breakdown is not None
+        ))
+    title = f"{TREND_RESOLUTIONS[resolution]['title']} Pothole Reports Trend"
+    if breakdown is not None:
+        title += f" by {breakdown.capitalize()}"
+    if len(counts) > max_points:
+        title += f" ({max_points} of {len(counts)} points shown)"
+    fig.update_layout(title=title, xaxis_title="Date", yaxis_title="Number of Reports")
+    return fig
+
+
+def top_states(summary, n=10):
+    state_counts = summary.count_by('state').head(n)
+    fig = px.bar(
+        x=state_counts.values,
+        y=state_counts.index,
+        orientation='h',
+        title="Top States by Pothole Reports",
+        color=state_counts.values,
+        color_continuous_scale='Reds'
+    )
+    fig.update_layout(showlegend=False, coloraxis_showscale=False)
+    return fig
+
+
+# None when the selection has no size/severity combinations to show
+def size_severity_heatmap(summary):
+    heatmap_data = summary.crosstab('size', 'severity')
+    if heatmap_data.empty:
+        return None
+    return px.imshow(
+        heatmap_data.values,
+        x=heatmap_data.columns,
+        y=heatmap_data.index,
+        title="Size vs Severity Distribution",
+        color_continuous_scale='Reds',
+        text_auto=True
+    )
+
+
+# `user_activity` is the Series returned by UserActivity.top()
+def top_users(user_activity):
+    fig = px.bar(
+        x=user_activity.values,
+        y=user_activity.index,
+        orientation='h',
+        title="Top 10 Most Active Users",
+        color=user_activity.values,
+        color_continuous_scale='Blues'
+    )
+    fig.update_layout(showlegend=False, coloraxis_showscale=False)
+    return fig
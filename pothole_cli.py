@@ -0,0 +1,182 @@
+# Headless batch mode: the Export tab's report and downloads, without Streamlit
+#
+#   python pothole_cli.py reports/2024-*.csv --out out/ --start 2024-01-01 --end 2024-12-31 \
+#       --severity High Critical --formats csv.gz parquet
+#
+# Files are parsed in parallel (one process per file, up to --workers), with
+# the same validation as the upload and the same filters as the sidebar
+# (omitted filters select everything). Written to --out:
+#   pothole_summary_<date>.txt    summary report, as downloaded from the Export tab
+#   pothole_states_<date>.csv     per-state counts by severity and status
+#   pothole_data_<date>.<ext>     filtered rows, one file per --formats entry
+#   rejected_rows_<date>.csv      invalid rows with file, line number and reason
+#   location_flags_<date>.csv     with --check-states or --state-from-coordinates, rows
+#                                 whose state disagrees with the boundary file or that lie
+#                                 outside it
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from pothole_cube import CountCube
+from pothole_data import (MEMORY_LIMIT_BYTES, REQUIRED_COLUMNS, MemoryLimitExceeded, MissingColumnsError,
+                          combine_chunks, read_pothole_csv)
+from pothole_dedupe import DEDUPE_DISTANCE_M, DEDUPE_WINDOW_MINUTES, duplicate_groups, merge_duplicates
+from pothole_exports import EXPORT_FORMATS, write_export
+from pothole_filters import FilterEngine
+from pothole_geo import BOUNDARY_PATH, boundary_index, flagged_rows, locate_states
+from pothole_reports import report_sections, state_breakdown, summary_report
+
+
+# Parse (and, unless duplicates are merged first, filter) one file; runs in a worker process
+def read_file(path, filters=None, memory_limit=MEMORY_LIMIT_BYTES):
+    try:
+        with open(path, 'rb') as source:
+            frame, rejected = read_pothole_csv(source, memory_limit=memory_limit)
+    except (MissingColumnsError, MemoryLimitExceeded) as e:
+        raise ValueError(f"{path}: {e}") from None
+    rejected.insert(0, 'file', path)
+    rows_read = len(frame)
+    if filters is not None and len(frame):
+        frame = FilterEngine(frame).select(**filters).take(frame).reset_index(drop=True)
+    return frame, rejected, rows_read
+
+
+def read_files(paths, filters=None, workers=None, memory_limit=MEMORY_LIMIT_BYTES):
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        results = [read_file(path, filters, memory_limit) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(read_file, paths, [filters] * len(paths), [memory_limit] * len(paths)))
+
+    # Files with no valid rows carry no categoricals to union
+    frame = combine_chunks([frame for frame, _, _ in results if len(frame)], REQUIRED_COLUMNS)
+    rejected = [rejected for _, rejected, _ in results if len(rejected)]
+    rejected = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame(columns=['file', 'row_number'])
+    return frame, rejected, sum(rows_read for _, _, rows_read in results)
+
+
+def parse_filters(args):
+    return dict(
+        state=args.state,
+        start_date=args.start,
+        end_date=args.end,
+        severities=args.severity,
+        statuses=args.status,
+        sizes=args.size,
+    )
+
+
+def run(args):
+    started = time.perf_counter()
+    generated = datetime.now()
+    stamp = generated.strftime('%Y%m%d')
+    filters = parse_filters(args)
+    timings = {}
+
+    def timed(name, start):
+        timings[name] = time.perf_counter() - start
+        return time.perf_counter()
+
+    # States are located and duplicates merged before filtering, as in the dashboard
+    locate = args.check_states or args.state_from_coordinates
+    filter_after = locate or args.merge_duplicates
+    mark = time.perf_counter()
+    frame, rejected, rows_read = read_files(args.files, None if filter_after else filters, args.workers)
+    mark = timed('read', mark)
+    flagged = None
+    if locate:
+        frame = locate_states(frame, boundary_index(args.boundaries), apply=args.state_from_coordinates)
+        flagged = flagged_rows(frame)
+        mark = timed('locate', mark)
+    if args.merge_duplicates:
+        frame = merge_duplicates(frame, duplicate_groups(frame, args.distance_m, args.window_minutes))
+        mark = timed('dedupe', mark)
+    if filter_after and len(frame):
+        frame = FilterEngine(frame).select(**filters).take(frame).reset_index(drop=True)
+        mark = timed('filter', mark)
+
+    summary = CountCube(frame).select()
+    sections = report_sections(summary) if summary.total else "No potholes match the selected filters.\n"
+    mark = timed('summary', mark)
+
+    os.makedirs(args.out, exist_ok=True)
+    written = []
+
+    def output(name):
+        path = os.path.join(args.out, name)
+        written.append(path)
+        return path
+
+    with open(output(f"pothole_summary_{stamp}.txt"), 'w', encoding='utf-8') as report:
+        report.write(summary_report(sections, generated))
+    state_breakdown(summary).to_csv(output(f"pothole_states_{stamp}.csv"))
+    if len(rejected):
+        rejected.to_csv(output(f"rejected_rows_{stamp}.csv"), index=False)
+    if flagged is not None and len(flagged):
+        flagged.to_csv(output(f"location_flags_{stamp}.csv"), index=False)
+    mark = timed('report', mark)
+
+    for fmt in args.formats:
+        path = output(f"pothole_data_{stamp}{EXPORT_FORMATS[fmt]['extension']}")
+        write_export(frame, np.arange(len(frame)), fmt, path)
+        mark = timed(f"export_{fmt}", mark)
+
+    print(f"{len(args.files)} files, {rows_read:,} valid rows ({len(rejected):,} rejected), "
+          f"{summary.total:,} selected in {time.perf_counter() - started:.1f}s")
+    print("  " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items()))
+    for path in written:
+        print(f"  wrote {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the pothole summary report and exports from CSV files")
+    parser.add_argument('files', nargs='+', help="Upload-format CSV files")
+    parser.add_argument('--out', default='.', help="Output directory (default: current directory)")
+    parser.add_argument('--workers', type=int, default=None, help="Parallel file readers (default: CPU count)")
+    parser.add_argument('--formats', nargs='*', default=['csv'], choices=list(EXPORT_FORMATS),
+                        help="Filtered data exports to write (none for the report only)")
+
+    filters = parser.add_argument_group("filters", "same as the dashboard sidebar; omitted filters select everything")
+    filters.add_argument('--state', default=None)
+    filters.add_argument('--start', type=lambda value: pd.Timestamp(value).date(), default=None,
+                         help="First detection date (YYYY-MM-DD)")
+    filters.add_argument('--end', type=lambda value: pd.Timestamp(value).date(), default=None,
+                         help="Last detection date (YYYY-MM-DD)")
+    filters.add_argument('--severity', nargs='+', default=None)
+    filters.add_argument('--status', nargs='+', default=None)
+    filters.add_argument('--size', nargs='+', default=None)
+
+    locations = parser.add_argument_group("locations")
+    locations.add_argument('--check-states', action='store_true',
+                           help="Flag reports whose state disagrees with the boundary file (written to location_flags)")
+    locations.add_argument('--state-from-coordinates', action='store_true',
+                           help="Also replace each report's state with the boundary file's, except near a state "
+                                "border; the bundled outlines are only accurate to 10-20 km")
+    locations.add_argument('--boundaries', default=BOUNDARY_PATH,
+                           help="GeoJSON state boundaries (default: the bundled Malaysia outlines)")
+
+    dedupe = parser.add_argument_group("duplicates")
+    dedupe.add_argument('--merge-duplicates', action='store_true',
+                        help="Count reports of the same pothole close together in space and time once")
+    dedupe.add_argument('--distance-m', type=float, default=DEDUPE_DISTANCE_M)
+    dedupe.add_argument('--window-minutes', type=float, default=DEDUPE_WINDOW_MINUTES)
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.files if not os.path.isfile(path)]
+    if missing:
+        parser.error(f"no such file: {', '.join(missing)}")
+    try:
+        run(args)
+    except Exception as e:
+        sys.exit(f"error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import numpy as np
+import pandas as pd
+
+# Count cube over state x day x severity x status x size. Only occupied cells
+# are stored, so every query costs O(cells) however many rows were ingested.
+CATEGORY_DIMENSIONS = ['state', 'severity', 'status', 'size']
+CUBE_DIMENSIONS = ['state', 'day', 'severity', 'status', 'size']
+
+# HyperLogLog precision for the per-cell distinct-user sketches (~0.8% error);
+# sketches are stored sparsely, so a high precision costs little memory
+HLL_PRECISION = 14
+
+
+def hash_values(values):
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+# Register index and rank (position of the first set bit) for each 64-bit hash
+def hll_registers(hashes, precision=HLL_PRECISION):
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # Top 52 of the remaining bits fit exactly in a float64 mantissa
+    rest = ((hashes << np.uint64(precision)) >> np.uint64(12)).astype(np.float64)
+    bit_length = np.frexp(rest)[1]
+    rank = np.where(rest > 0, 53 - bit_length, 53).astype(np.uint8)
+    return index, rank
+
+
+def hll_estimate(registers):
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros > 0:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+# Level list holding every level of `levels` followed by any new ones of `extra`
+def merge_levels(levels, extra):
+    seen = set(levels)
+    return list(levels) + sorted(level for level in extra if level not in seen)
+
+
+class CountCube:
+    def __init__(self, df):
+        levels = {col: list(df[col].cat.categories) for col in CATEGORY_DIMENSIONS}
+
+        # Missing values get their own slot after the known levels
+        codes = {}
+        for col in CATEGORY_DIMENSIONS:
+            col_codes = df[col].cat.codes.to_numpy().astype(np.int64)
+            codes[col] = np.where(col_codes < 0, len(levels[col]), col_codes)
+
+        days = df['date_detected'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        valid = ~np.isnat(days)
+        first_day = days[valid].min() if valid.any() else np.datetime64('1970-01-01', 'D')
+        # Undated rows sit at day -1 and never fall inside a date range
+        codes['day'] = np.where(valid, (days - first_day).astype(np.int64), -1)
+
+        users = df['user_id']
+        known = users.notna().to_numpy()
+        register, rank = hll_registers(hash_values(users[known]))
+        self._build(levels, first_day, codes, np.ones(len(df), dtype=np.int64),
+                    np.flatnonzero(known), register, rank)
+
+    # Cell table from entries (rows, or the cells of other cubes) with their
+    # codes and counts; each sketch entry belongs to the entry at its position
+    def _build(self, levels, first_day, codes, weights, sketch_entry, register, rank):
+        self.levels = levels
+        self.first_day = first_day
+        n_days = int(codes['day'].max()) + 1 if len(weights) else 0
+
+        radices = {
+            'state': len(self.levels['state']) + 1,
+            'day': n_days + 1,
+            'severity': len(self.levels['severity']) + 1,
+            'status': len(self.levels['status']) + 1,
+            'size': len(self.levels['size']) + 1,
+        }
+        key = np.zeros(len(weights), dtype=np.int64)
+        for dim in CUBE_DIMENSIONS:
+            key = key * radices[dim] + codes[dim] + (1 if dim == 'day' else 0)
+        cells, cell_index = np.unique(key, return_inverse=True)
+        cell_index = cell_index.reshape(-1)
+
+        # Cells whose entries cancel out (see updated) are dropped
+        counts = np.bincount(cell_index, weights=weights, minlength=len(cells)).round().astype(np.int64)
+        occupied = counts > 0
+        renumber = np.cumsum(occupied) - 1
+        self.counts = counts[occupied]
+        cells = cells[occupied]
+        self.cells = {}
+        for dim in reversed(CUBE_DIMENSIONS):
+            self.cells[dim] = (cells % radices[dim]).astype(np.int32)
+            cells = cells // radices[dim]
+        self.cells['day'] -= 1
+        self.n_days = int(self.cells['day'].max()) + 1 if len(self.counts) else 0
+
+        # Sparse HLL sketches: only the non-empty (cell, register) pairs are kept
+        sketch_cell = cell_index[sketch_entry]
+        kept = occupied[sketch_cell]
+        n_registers = 1 << HLL_PRECISION
+        pair = renumber[sketch_cell[kept]] * n_registers + register[kept]
+        rank = rank[kept]
+        order = np.lexsort((rank, pair))
+        pair, rank = pair[order], rank[order]
+        last = np.flatnonzero(np.r_[pair[1:] != pair[:-1], True]) if len(pair) else np.array([], dtype=np.int64)
+        self.sketch_cell = (pair[last] // n_registers).astype(np.int32)
+        self.sketch_register = (pair[last] % n_registers).astype(np.uint16)
+        self.sketch_rank = rank[last]
+
+    # Cube over the rows counted here plus `added`, minus `removed` (rows
+    # counted here, e.g. the previous version of a report whose status
+    # changed). Only the changed rows are read; the cell tables are merged.
+    # Sketches cannot forget a user, so a removed row's user still counts in
+    # its old cell (distinct users over a status filter may read slightly high).
+    def updated(self, added, removed=None):
+        parts = [(self, 1), (CountCube(added), 1)]
+        if removed is not None and len(removed):
+            parts.append((CountCube(removed), -1))
+        parts = [(cube, sign) for cube, sign in parts if cube.n_cells]
+        if not parts:
+            return self
+
+        levels = dict(self.levels)
+        for cube, _ in parts:
+            for dim in CATEGORY_DIMENSIONS:
+                levels[dim] = merge_levels(levels[dim], cube.levels[dim])
+        first_day = min(cube.first_day + int(cube.cells['day'][cube.cells['day'] >= 0].min(initial=0))
+                        for cube, _ in parts)
+
+        codes = {dim: [] for dim in CUBE_DIMENSIONS}
+        weights, sketch_entry, register, rank = [], [], [], []
+        offset = 0
+        for cube, sign in parts:
+            for dim in CATEGORY_DIMENSIONS:
+                # Old level code -> merged code, the missing slot included
+                remap = np.array([levels[dim].index(level) for level in cube.levels[dim]] + [len(levels[dim])])
+                codes[dim].append(remap[cube.cells[dim]])
+            shift = int((cube.first_day - first_day).astype(np.int64))
+            codes['day'].append(np.where(cube.cells['day'] >= 0, cube.cells['day'].astype(np.int64) + shift, -1))
+            weights.append(cube.counts * sign)
+            if sign > 0:
+                sketch_entry.append(cube.sketch_cell.astype(np.int64) + offset)
+                register.append(cube.sketch_register.astype(np.int64))
+                rank.append(cube.sketch_rank)
+            offset += cube.n_cells
+
+        cube = CountCube.__new__(CountCube)
+        cube._build(levels, first_day, {dim: np.concatenate(values) for dim, values in codes.items()},
+                    np.concatenate(weights), np.concatenate(sketch_entry), np.concatenate(register),
+                    np.concatenate(rank))
+        return cube
+
+    @property
+    def n_cells(self):
+        return len(self.counts)
+
+    @property
+    def nbytes(self):
+        arrays = [self.counts, self.sketch_cell, self.sketch_register, self.sketch_rank, *self.cells.values()]
+        return sum(a.nbytes for a in arrays)
+
+    def day_index(self, value):
+        day = np.datetime64(pd.Timestamp(value).date(), 'D')
+        return int((day - self.first_day).astype(np.int64))
+
+    def _isin(self, dim, values):
+        wanted = [code for code, level in enumerate(self.levels[dim]) if level in set(values)]
+        return np.isin(self.cells[dim], wanted)
+
+    def select(self, state=None, start_date=None, end_date=None, severities=None, statuses=None, sizes=None):
+        mask = np.ones(self.n_cells, dtype=bool)
+        if state is not None:
+            mask &= self._isin('state', [state])
+        if start_date is not None:
+            mask &= self.cells['day'] >= max(self.day_index(start_date), 0)
+        if end_date is not None:
+            mask &= (self.cells['day'] >= 0) & (self.cells['day'] <= self.day_index(end_date))
+        for dim, values in (('severity', severities), ('status', statuses), ('size', sizes)):
+            if values is not None:
+                mask &= self._isin(dim, values)
+        return CubeSlice(self, mask)
+
+
+# Sums over the cells selected by one combination of sidebar filters
+class CubeSlice:
+    def __init__(self, cube, mask):
+        self.cube = cube
+        self.mask = mask
+        self.counts = cube.counts[mask]
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def _sums(self, dim, size):
+        codes = self.cube.cells[dim][self.mask]
+        return np.bincount(codes, weights=self.counts, minlength=size).astype(np.int64)
+
+    # Same shape as value_counts(): most frequent first, no empty levels
+    def count_by(self, dim):
+        if dim == 'day':
+            return self.daily_counts()
+        levels = self.cube.levels[dim]
+        sums = self._sums(dim, len(levels) + 1)[:len(levels)]
+        counts = pd.Series(sums, index=pd.Index(levels, name=dim), name='count')
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def count_of(self, dim, value):
+        levels = self.cube.levels[dim]
+        if value not in levels:
+            return 0
+        codes = self.cube.cells[dim][self.mask]
+        return int(self.counts[codes == levels.index(value)].sum())
+
+    def nunique(self, dim):
+        return len(self.count_by(dim))
+
+    def daily_counts(self):
+        days = self.cube.cells['day'][self.mask]
+        dated = days >= 0
+        sums = np.bincount(days[dated], weights=self.counts[dated], minlength=self.cube.n_days).astype(np.int64)
+        present = np.flatnonzero(sums)
+        dates = pd.DatetimeIndex(self.cube.first_day + present.astype('timedelta64[D]'), name='date')
+        return pd.Series(sums[present], index=dates, name='count')
+
+    # Per-day counts for every day the cube spans (zeros included), one column
+    # per level of `dim` that occurs in the selection
+    def daily_counts_by(self, dim):
+        levels = self.cube.levels[dim]
+        width = len(levels) + 1
+        days = self.cube.cells['day'][self.mask]
+        dated = days >= 0
+        codes = days[dated].astype(np.int64) * width + self.cube.cells[dim][self.mask][dated]
+        sums = np.bincount(codes, weights=self.counts[dated], minlength=self.cube.n_days * width)
+        dates = pd.DatetimeIndex(self.cube.first_day + np.arange(self.cube.n_days).astype('timedelta64[D]'),
+                                 name='date')
+        table = pd.DataFrame(sums.reshape(-1, width)[:, :len(levels)].astype(np.int64), index=dates,
+                             columns=pd.Index(levels, name=dim))
+        return table.loc[:, table.sum(axis=0) > 0]
+
+    def crosstab(self, rows, cols):
+        row_levels, col_levels = self.cube.levels[rows], self.cube.levels[cols]
+        width = len(col_levels) + 1
+        codes = self.cube.cells[rows][self.mask].astype(np.int64) * width + self.cube.cells[cols][self.mask]
+        sums = np.bincount(codes, weights=self.counts, minlength=(len(row_levels) + 1) * width)
+        table = pd.DataFrame(sums.reshape(-1, width)[:len(row_levels), :len(col_levels)].astype(np.int64),
+                             index=pd.Index(row_levels, name=rows), columns=pd.Index(col_levels, name=cols))
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    def date_range(self):
+        days = self.cube.cells['day'][self.mask][self.counts > 0]
+        days = days[days >= 0]
+        if not len(days):
+            return None, None
+        return (pd.Timestamp(self.cube.first_day + np.timedelta64(int(days.min()), 'D')),
+                pd.Timestamp(self.cube.first_day + np.timedelta64(int(days.max()), 'D')))
+
+    # Rows whose detection date (midnight) is at or after `timestamp`
+    def count_since(self, timestamp):
+        timestamp = pd.Timestamp(timestamp)
+        first = timestamp.normalize()
+        if first < timestamp:
+            first += pd.Timedelta(days=1)
+        days = self.cube.cells['day'][self.mask]
+        return int(self.counts[(days >= 0) & (days >= self.cube.day_index(first))].sum())
+
+    def distinct_users(self):
+        selected = self.mask[self.cube.sketch_cell]
+        registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+        np.maximum.at(registers, self.cube.sketch_register[selected], self.cube.sketch_rank[selected])
+        return hll_estimate(registers)
+
+
+# Per-user report counts; users are too many for a cube dimension, so top-N
+# lists are answered from factorized codes of the selected rows
+class UserActivity:
+    def __init__(self, df):
+        self.codes, self.users = pd.factorize(df['user_id'])
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    # Activity for df: the indexed frame with the rows at `replaced`
+    # rewritten and new rows appended; only those rows are factorized
+    def updated(self, df, replaced):
+        activity = UserActivity.__new__(UserActivity)
+        changed = np.r_[np.asarray(replaced, dtype=np.int64), np.arange(len(self.codes), len(df))]
+        users = pd.Index(self.users)
+        values = df['user_id'].take(changed).astype(object).to_numpy()
+        codes = users.get_indexer(values)
+        unseen = (codes < 0) & pd.notna(values)
+        new_codes, new_users = pd.factorize(values[unseen])
+        codes[unseen] = len(users) + new_codes
+        activity.users = users.append(pd.Index(new_users))
+        activity.codes = np.r_[self.codes, np.full(len(df) - len(self.codes), -1, dtype=self.codes.dtype)]
+        activity.codes[changed] = codes
+        return activity
+
+    def top(self, selection, n=10):
+        codes = self.codes if selection.all else self.codes[selection.rows()]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.users))
+        top = np.argsort(-counts, kind='stable')[:n]
+        top = top[counts[top] > 0]
+        return pd.Series(counts[top], index=pd.Index(self.users[top], name='user_id'), name='count')
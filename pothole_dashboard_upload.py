@@ -1,11 +1,29 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
 from streamlit_folium import st_folium
 from datetime import datetime, timedelta
 import numpy as np
+import uuid
+from pothole_charts import (TREND_RESOLUTIONS, report_trend, severity_pie, size_severity_heatmap, status_bar,
+                            top_states, top_users)
+from pothole_data import (MemoryLimitExceeded, MissingColumnsError, content_hash, dataset_cache, empty_dataset,
+                          load_dataset, observed_levels)
+from pothole_cube import CountCube, UserActivity
+from pothole_dedupe import DEDUPE_DISTANCE_M, DEDUPE_WINDOW_MINUTES, merged_dataset
+from pothole_exports import EXPORT_FORMATS, export_cache
+from pothole_filters import FilterEngine, filter_key
+from pothole_geo import boundary_index, flagged_rows, located_dataset
+from pothole_live import LIVE_REFRESH_SECONDS, live_feed
+from pothole_perf import PERF_DETAILED, PERF_LOG_PATH, RunProfiler, recent_records, summarize
+from pothole_map import (MAP_HEIGHT, MAP_WIDTH, MAX_ZOOM, build_cluster_map, build_density_map, build_pothole_map,
+                         cell_size_for_zoom, cluster_bounds, fit_view, map_nbytes)
+from pothole_memo import approximate_size, render_memo
+from pothole_reports import report_sections, summary_report
+from pothole_search import SearchIndex, scan_search
+from pothole_spatial import SpatialIndex, scan_within
+from pothole_store import PotholeStore, load_store_dataset
+from pothole_table import (DEFAULT_PAGE_SIZE, PAGE_SIZES, format_page, page_count, page_slice, restrict_order,
+                           sort_order)
 
 # Set page configuration
 st.set_page_config(
@@ -61,6 +79,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Authentication functions
+def get_session_id():
+    # Identifies this browser session to the shared dataset cache and the perf log
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:12]
+    return st.session_state.session_id
+
 def init_session_state():
     if "authenticated" not in st.session_state:
         st.session_state.authenticated = False
@@ -81,6 +105,7 @@ def authenticate_user(username, password):
     return False
 
 def logout():
+    dataset_cache.release(get_session_id())
     st.session_state.authenticated = False
     st.session_state.user_role = None
     if "username" in st.session_state:
@@ -108,26 +133,136 @@ def show_login():
     st.info("**Viewer:** username=`viewer`, password=`view123`")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Indexes queued for background building as soon as a dataset is loaded, most
+# urgent first. Filters and the cube are awaited; the views fall back to
+# scanning the selection while the spatial and search indexes finish.
+PREBUILT_ARTIFACTS = {
+    'filters': FilterEngine,
+    'cube': CountCube,
+    'users': UserActivity,
+    'spatial': SpatialIndex,
+    'search': SearchIndex,
+}
+ARTIFACT_LABELS = {
+    'filters': "Filter bitmaps",
+    'cube': "Count cube",
+    'users': "User activity",
+    'spatial': "Spatial index",
+    'search': "Search index",
+}
+ARTIFACT_ICONS = {'ready': "✅", 'building': "⏳", 'queued': "🕒", 'failed': "⚠️", None: "▫️"}
+ARTIFACT_POLL_SECONDS = 1
+
 # Load data function - NO SAMPLE DATA
 def load_data(uploaded_file=None):
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            # Validate required columns
-            required_cols = ['pothole_id', 'latitude', 'longitude', 'state', 'address', 
-                           'size', 'severity', 'date_detected', 'time_detected', 'user_id', 'status']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            if missing_cols:
-                st.error(f"Missing required columns: {', '.join(missing_cols)}")
-                return None
-            return df
+            # Parsed once per file content; reruns are served from the dataset cache.
+            # The upload is streamed in chunks, so progress is reported per chunk
+            progress_bar = st.sidebar.empty()
+
+            def report_progress(fraction, rows_read):
+                progress_bar.progress(fraction, text=f"Reading rows... {rows_read:,}")
+
+            # Hashed once per upload (file_id changes with every new upload), not on every rerun
+            if st.session_state.get('upload_hash', (None,))[0] != uploaded_file.file_id:
+                st.session_state.upload_hash = (uploaded_file.file_id, content_hash(uploaded_file))
+            uploaded_file.seek(0)
+            try:
+                dataset = load_dataset(uploaded_file, progress=report_progress, session=get_session_id(),
+                                       key=st.session_state.upload_hash[1])
+            finally:
+                progress_bar.empty()
+            dataset.prebuild(PREBUILT_ARTIFACTS)
+            return dataset
+        except MissingColumnsError as e:
+            st.error(str(e))
+            return None
+        except MemoryLimitExceeded as e:
+            st.error(f"{str(e)}. Split the file into smaller uploads or raise POTHOLE_MEMORY_LIMIT_MB.")
+            return None
         except Exception as e:
             st.error(f"Error loading file: {str(e)}")
             return None
     else:
-        # Return empty dataframe - NO SAMPLE DATA
-        return pd.DataFrame(columns=['pothole_id', 'latitude', 'longitude', 'state', 'address', 
-                                   'size', 'severity', 'date_detected', 'time_detected', 'user_id', 'status'])
+        # Return empty dataset - NO SAMPLE DATA
+        dataset_cache.release(get_session_id())
+        return empty_dataset()
+
+# Opens the persistent dataset store; only the chosen state/month partitions are read
+STORE_DEFAULT_MONTHS = 12
+
+def load_store_data(store):
+    partitions = store.partitions()
+    if partitions.empty:
+        return empty_dataset()
+    
+    states = sorted(partitions['state'].unique())
+    months = sorted(partitions['month'].unique())
+    selected_states = st.sidebar.multiselect("States to load", states, default=states)
+    if len(months) > 1:
+        first, last = st.sidebar.select_slider(
+            "Months to load",
+            options=months,
+            value=(months[max(0, len(months) - STORE_DEFAULT_MONTHS)], months[-1])
+        )
+        months = months[months.index(first):months.index(last) + 1]
+    
+    try:
+        dataset = load_store_dataset(store, states=selected_states, months=months, session=get_session_id())
+    except Exception as e:
+        st.error(f"Error reading dataset store: {str(e)}")
+        return None
+    dataset.prebuild(PREBUILT_ARTIFACTS)
+    return dataset
+
+# Live feed from the drop directory, shared by every session watching it. The
+# status fragment polls at the chosen interval and reruns the page only when
+# new reports arrived (0 pauses polling)
+LIVE_REFRESH_OPTIONS = sorted({0, 1, 2, 5, 10, 30, 60, LIVE_REFRESH_SECONDS})
+
+def load_live_data():
+    dataset_cache.release(get_session_id())
+    interval = st.sidebar.select_slider(
+        "Refresh every",
+        options=LIVE_REFRESH_OPTIONS,
+        value=LIVE_REFRESH_SECONDS,
+        format_func=lambda seconds: f"{seconds}s" if seconds else "Paused"
+    )
+    feed = live_feed()
+    dataset = feed.refresh()
+    dataset.prebuild(PREBUILT_ARTIFACTS)
+    
+    @st.fragment(run_every=interval or None)
+    def live_status():
+        if interval and feed.refresh().key != dataset.key:
+            st.rerun()
+        if feed.last_change is None:
+            st.caption(f"📡 Watching {feed.directory} - no reports yet")
+        else:
+            st.caption(f"📡 Updated {feed.last_change:%H:%M:%S}: {feed.last_delta['added']} new, "
+                       f"{feed.last_delta['updated']} updated")
+        for error in feed.errors:
+            st.warning(f"⚠️ {error}")
+    
+    with st.sidebar:
+        live_status()
+    return dataset
+
+# Sidebar readiness of the background builds. Polls while any is unfinished,
+# then reruns the whole page once so the scanning fallbacks are replaced.
+def show_artifact_status(dataset):
+    waiting = not dataset.ready(PREBUILT_ARTIFACTS)
+    
+    @st.fragment(run_every=ARTIFACT_POLL_SECONDS if waiting else None)
+    def artifact_status():
+        st.caption("  \n".join(f"{ARTIFACT_ICONS[dataset.status(name)]} {label}"
+                               for name, label in ARTIFACT_LABELS.items()))
+        if waiting and dataset.ready(PREBUILT_ARTIFACTS):
+            st.rerun()
+    
+    with st.sidebar.expander("⚙️ Indexes", expanded=waiting):
+        artifact_status()
 
 # Upload instructions page
 def show_upload_instructions():
@@ -166,8 +301,439 @@ PH001,3.139000,101.686900,Kuala Lumpur,"Jalan Bukit Bintang",Medium,High,2024-12
     st.markdown("👆 **Use the sidebar to upload your CSV file**")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Map view state - follows the bounds/zoom/clicks st_folium reported on the previous run
+def get_map_view(dataset, selection):
+    returned = st.session_state.get("pothole_map_clusters") or {}
+    bounds, zoom = returned.get('bounds'), returned.get('zoom')
+    reported = None
+    if bounds and zoom and bounds['_southWest']['lat'] is not None:
+        reported = (int(zoom), bounds['_southWest']['lat'], bounds['_southWest']['lng'],
+                    bounds['_northEast']['lat'], bounds['_northEast']['lng'])
+    # Only clicks on a map object (a cell or marker) count; clicks on empty map
+    # just pick a point for the Near panel
+    clicked = returned.get('last_object_clicked')
+    
+    # New dataset (or reset): fit the data and ignore anything reported for the old view
+    view = st.session_state.get("map_view")
+    if view is None or view['dataset'] != dataset.key:
+        center, zoom = fit_view(selection.take(dataset.frame))
+        view = {'dataset': dataset.key, 'center': center, 'zoom': zoom, 'reported': reported, 'clicked': clicked,
+                'aggregated': False}
+    
+    # Pan/zoom by the user
+    if reported is not None and reported != view['reported']:
+        view['reported'] = reported
+        center = ((reported[1] + reported[3]) / 2, (reported[2] + reported[4]) / 2)
+        # Small drifts from re-rendering the same view should not trigger a rebuild
+        tolerance = cell_size_for_zoom(view['zoom']) / 4
+        moved = max(abs(center[0] - view['center'][0]), abs(center[1] - view['center'][1])) > tolerance
+        if reported[0] != view['zoom'] or moved:
+            view['center'], view['zoom'] = center, reported[0]
+    
+    # Clicking a cluster cell drills down into it; a marker click on a map
+    # already showing individual potholes leaves the view alone
+    if clicked and clicked != view['clicked']:
+        view['clicked'] = clicked
+        if view['aggregated']:
+            view['center'] = (clicked['lat'], clicked['lng'])
+            view['zoom'] = min(view['zoom'] + 2, MAX_ZOOM)
+    
+    st.session_state.map_view = view
+    return view
+
+# Point last clicked on a map (a marker, else anywhere on the map)
+def get_clicked_point(map_key):
+    returned = st.session_state.get(map_key) or {}
+    clicked = returned.get('last_object_clicked') or returned.get('last_clicked')
+    if clicked and clicked.get('lat') is not None:
+        return clicked['lat'], clicked['lng']
+    return None
+
+# Potholes around the clicked point, from the spatial index (nearest few when none are in range)
+def show_nearby(profiler, dataset, selection, point):
+    with st.expander(f"📍 Near {point[0]:.5f}, {point[1]:.5f}", expanded=True):
+        radius = st.number_input("Radius (metres)", min_value=10, max_value=50_000, value=250, step=50)
+        with profiler.stage("nearby", rows_in=len(selection)) as stage:
+            index = dataset.peek('spatial')
+            if index is not None:
+                rows, distances = index.within(point[0], point[1], radius, selection)
+            else:
+                # Spatial index still building - measure every selected row instead
+                rows, distances = scan_within(dataset.frame, point[0], point[1], radius, selection.rows())
+            if len(rows):
+                st.caption(f"{len(rows)} potholes within {radius} m"
+                           + (f" - showing the nearest {NEARBY_ROWS}" if len(rows) > NEARBY_ROWS else ""))
+            else:
+                if index is not None:
+                    rows, distances = index.nearest(point[0], point[1], NEARBY_NEAREST, selection)
+                else:
+                    rows, distances = scan_within(dataset.frame, point[0], point[1], np.inf, selection.rows())
+                    rows, distances = rows[:NEARBY_NEAREST], distances[:NEARBY_NEAREST]
+                st.caption(f"No potholes within {radius} m - the nearest {len(rows)}:")
+            nearby_df = format_page(dataset.frame.take(rows[:NEARBY_ROWS]))
+            nearby_df.insert(0, 'distance_m', distances[:NEARBY_ROWS].round(1))
+            stage.rows_out = len(nearby_df)
+        st.dataframe(nearby_df, hide_index=True, use_container_width=True)
+
+# Rendered artifacts are shared by all sessions through an LRU memo; `key` holds
+# the dataset hash and filter state plus anything else the result depends on
+def view_memo(name, key, build, size=approximate_size):
+    return render_memo.get((name, key), build, size=size)
+
+# Plotly figure in the current column, timed as its own stage
+def show_chart(profiler, name, key, build, *args):
+    with profiler.stage(f"chart_{name}") as stage:
+        fig = view_memo(f"chart_{name}", key, lambda: build(*args))
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+            profiler.measure_payload(stage, lambda: len(fig.to_json()))
+
+# Admin-only performance panel: this run's stages and latency across recent runs of all sessions
+def show_perf_panel(profiler):
+    with st.sidebar.expander("⏱️ Performance"):
+        st.toggle("Detailed profiling", key="perf_detailed",
+                  help="Also record peak memory (tracemalloc, process-wide) and payload bytes; "
+                       "slows the dashboard down")
+        records = pd.DataFrame(profiler.records())
+        if not records.empty:
+            st.caption(f"This run: {records['seconds'].sum():.2f}s")
+            st.dataframe(records[['stage', 'seconds', 'rows_in', 'rows_out', 'peak_bytes', 'payload_bytes']],
+                         hide_index=True, use_container_width=True,
+                         column_config={'peak_bytes': st.column_config.NumberColumn(
+                             "process peak bytes",
+                             help="Peak traced memory of the whole process during the stage, "
+                                  "including other sessions' allocations")})
+        st.caption("Recent runs (all sessions)")
+        st.dataframe(summarize(recent_records()), hide_index=True, use_container_width=True)
+        st.caption(f"Stage records are appended to {PERF_LOG_PATH}" if PERF_LOG_PATH else
+                   "Set POTHOLE_PERF_LOG to a file path to keep stage records as JSON lines")
+        cache = dataset_cache.stats()
+        st.caption(f"Dataset cache: {len(cache['datasets'])} datasets, {cache['bytes'] / 1e6:.1f} of "
+                   f"{cache['max_bytes'] / 1e6:.0f} MB, {cache['sessions']} sessions, {cache['evictions']} evicted")
+        if cache['datasets']:
+            st.dataframe(pd.DataFrame(cache['datasets']), hide_index=True, use_container_width=True)
+        memo = render_memo.stats()
+        st.caption(f"Render memo: {memo['entries']} entries, {memo['bytes'] / 1e6:.1f} MB, "
+                   f"{memo['hits']} hits / {memo['misses']} misses ({memo['hit_rate']:.0%}), "
+                   f"{memo['evictions']} evicted")
+
+# Views - only the selected view is computed on each rerun
+NEARBY_ROWS = 100
+NEARBY_NEAREST = 5
+
+def show_map_view(profiler, dataset, selection, summary, signature):
+    total = summary.total
+    st.subheader("Interactive Pothole Map")
+    
+    if total > 0:
+        # Auto mode aggregates into zoom-dependent grid cells and only sends
+        # individual markers once few enough potholes are in view
+        map_mode = st.radio(
+            "Map rendering",
+            ["Auto (clusters)", "Density heatmap", "Fast layer", "Individual markers"],
+            horizontal=True,
+            help="Auto groups potholes into cells for the current zoom level; "
+                 "density heatmap shows hot spots as one pre-binned image; "
+                 "fast layer sends all points as one GeoJSON layer; "
+                 "individual markers build one popup per pothole"
+        )
+        
+        with profiler.stage("map", rows_in=total) as stage:
+            if map_mode == "Auto (clusters)":
+                map_key = "pothole_map_clusters"
+                view = get_map_view(dataset, selection)
+                
+                # Only the potholes in view are read, via the spatial index
+                # (or a scan of the selection while it is still building)
+                def build_view():
+                    index = dataset.peek('spatial')
+                    if index is None:
+                        return build_cluster_map(selection.take(dataset.frame), view['center'], view['zoom'])
+                    rows = index.bbox(cluster_bounds(view['center'], view['zoom']), selection)
+                    return build_cluster_map(None, view['center'], view['zoom'], visible=dataset.frame.take(rows))
+                
+                m, map_summary = view_memo("map", (signature, map_mode, view['center'], view['zoom']), build_view,
+                                           size=lambda built: map_nbytes(built[0]))
+                stage.rows_out = map_summary['visible'] if map_summary['cells'] is None else map_summary['cells']
+                # What the next run's click was made on
+                view['aggregated'] = map_summary['cells'] is not None
+            
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    if map_summary['cells'] is None:
+                        st.caption(f"Showing {map_summary['visible']} potholes in view")
+                    else:
+                        st.caption(f"{map_summary['visible']} potholes in view grouped into {map_summary['cells']} "
+                                   f"cells - zoom in or click a cell to see individual potholes")
+                with col2:
+                    if st.button("🎯 Reset view", use_container_width=True):
+                        del st.session_state.map_view
+                        st.rerun()
+            
+                # Display map
+                st_folium(m, width=MAP_WIDTH, height=MAP_HEIGHT, key=map_key,
+                          returned_objects=["last_clicked", "last_object_clicked", "bounds", "zoom"])
+            elif map_mode == "Density heatmap":
+                map_key = "pothole_map_density"
+                weighting = st.pills("Weight by", ["severity", "size"], selection_mode="multi",
+                                     format_func=str.capitalize,
+                                     help="Count severe and large potholes more heavily (Low 1 to Critical 4; "
+                                          "sizes by marker radius)")
+                
+                # Only the coordinates (and weighting columns) of the selected rows are read
+                def build_density():
+                    columns = ['latitude', 'longitude', *weighting]
+                    return build_density_map(selection.take(dataset.frame[columns]), tuple(weighting))
+                
+                m, density = view_memo("map", (signature, map_mode, tuple(sorted(weighting))), build_density,
+                                       size=lambda built: map_nbytes(built[0]))
+                stage.rows_out = density['cells']
+                st.caption(f"{total} potholes binned into {density['cells']} cells "
+                           f"({density['shape'][1]} x {density['shape'][0]} grid, log colour scale)")
+                st_folium(m, width=MAP_WIDTH, height=MAP_HEIGHT, key=map_key, returned_objects=["last_clicked"])
+            else:
+                map_key = "pothole_map_points"
+                filtered_df = selection.take(dataset.frame)
+                m = view_memo("map", (signature, map_mode), lambda: build_pothole_map(
+                    filtered_df, mode='markers' if map_mode == "Individual markers" else 'layer'), size=map_nbytes)
+                stage.rows_out = len(filtered_df)
+            
+                # Display map
+                st_folium(m, width=MAP_WIDTH, height=MAP_HEIGHT, key=map_key,
+                          returned_objects=["last_clicked", "last_object_clicked"])
+            profiler.measure_payload(stage, lambda: len(m.get_root().render().encode('utf-8')))
+        
+        point = get_clicked_point(map_key)
+        if point is not None:
+            show_nearby(profiler, dataset, selection, point)
+        
+        # Legend
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Severity Legend:**")
+            st.markdown("🟢 Low | 🟠 Medium | 🔴 High | 🟤 Critical")
+        with col2:
+            st.markdown("**Size Legend:**")
+            st.markdown("Small ● | Medium ●● | Large ●●●")
+        
+    else:
+        st.info("No potholes to display with current filters.")
+
+def show_analytics_view(profiler, dataset, selection, summary, signature):
+    total = summary.total
+    st.subheader("Analytics Dashboard")
+    
+    if total > 0:
+        # Row 1: Distributions
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Severity distribution
+            show_chart(profiler, "severity", signature, severity_pie, summary)
+        
+        with col2:
+            # Status distribution
+            show_chart(profiler, "status", signature, status_bar, summary)
+        
+        # Row 2: Trends and Geography
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Time series - day/week/month picked from the date span unless chosen
+            trend_col1, trend_col2 = st.columns(2)
+            with trend_col1:
+                resolution = st.selectbox("Resolution", ["auto", *TREND_RESOLUTIONS], format_func=str.capitalize)
+            with trend_col2:
+                breakdown = st.selectbox("Break down by", [None, "severity", "state"],
+                                         format_func=lambda dim: "Nothing" if dim is None else dim.capitalize())
+            show_chart(profiler, "timeline", (signature, resolution, breakdown), report_trend, summary,
+                       resolution, breakdown)
+        
+        with col2:
+            # State distribution
+            show_chart(profiler, "states", signature, top_states, summary)
+        
+        # Row 3: Additional insights
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Size vs Severity heatmap
+            show_chart(profiler, "heatmap", signature, size_severity_heatmap, summary)
+        
+        with col2:
+            # User activity
+            user_activity = dataset.artifact('users', UserActivity).top(selection, 10)
+            show_chart(profiler, "users", signature, top_users, user_activity)
+    
+    else:
+        st.info("No data available for analytics with current filters.")
+
+def show_table_view(profiler, dataset, selection, summary, signature):
+    df = dataset.frame
+    total = summary.total
+    st.subheader("Pothole Data Table")
+    
+    if total > 0:
+        # Search functionality
+        search_term = st.text_input("🔍 Search in table", placeholder="Search by ID, address, or user...")
+        
+        with profiler.stage("table", rows_in=total) as stage:
+            if search_term:
+                # Trigram index lookup, restricted to the sidebar selection and
+                # ranked by matching field (ID, user, state, then address)
+                index = dataset.peek('search')
+                if index is not None:
+                    rows = index.search(search_term, selection)
+                else:
+                    st.caption("⏳ Search index still building - scanning the selected rows")
+                    rows = scan_search(dataset.frame, search_term, selection)
+            else:
+                rows = None
+            n_display = len(rows) if rows is not None else total
+        
+            # Column selection
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"Showing {n_display} of {total} records")
+            with col2:
+                if st.session_state.user_role == "admin":
+                    if st.button("📝 Edit Mode", help="Enable editing for admin users"):
+                        st.info("Edit mode would be implemented here for admin users")
+        
+            # Paging controls - only the current page is formatted and sent to the browser
+            col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+            with col1:
+                sort_options = ["Relevance" if rows is not None else "Row order"] + list(df.columns)
+                sort_column = st.selectbox("Sort by", sort_options)
+            with col2:
+                descending = st.toggle("Descending")
+            with col3:
+                page_size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
+            with col4:
+                n_pages = page_count(n_display, page_size)
+                page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        
+            if sort_column in df.columns:
+                order = dataset.artifact(f"order:{sort_column}", lambda frame: sort_order(frame, sort_column))
+                ordered_rows = restrict_order(order, rows=rows, selection=selection)
+            else:
+                ordered_rows = rows if rows is not None else selection.rows()
+            if descending:
+                ordered_rows = ordered_rows[::-1]
+        
+            # Display table
+            page_df = format_page(df.take(page_slice(ordered_rows, page, page_size)))
+            stage.rows_out = len(page_df)
+            profiler.measure_payload(stage, lambda: int(page_df.memory_usage(deep=True).sum()))
+            st.dataframe(
+                page_df,
+                column_config={
+                    'latitude': st.column_config.NumberColumn(format="%.6f"),
+                    'longitude': st.column_config.NumberColumn(format="%.6f")
+                },
+                use_container_width=True,
+                height=400
+            )
+            st.caption(f"Page {page} of {n_pages}")
+        
+        # Quick stats for filtered data
+        if n_display > 0:
+            stat_rows = rows if rows is not None else selection.rows()
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Filtered Records", n_display)
+            with col2:
+                st.metric("Unique States", df['state'].take(stat_rows).nunique())
+            with col3:
+                st.metric("Critical Issues", int((df['severity'].take(stat_rows) == 'Critical').sum()))
+            with col4:
+                st.metric("Unique Users", df['user_id'].take(stat_rows).nunique())
+    
+    else:
+        st.info("No data matches current filters.")
+
+def show_export_view(profiler, dataset, selection, summary, signature):
+    total = summary.total
+    st.subheader("📊 Export & Reports")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("### 📥 Data Export")
+        
+        if total > 0:
+            # Export filtered data - written in chunks only when the button is
+            # clicked, then kept on disk per filter signature and format
+            export_format = st.radio(
+                "Format",
+                list(EXPORT_FORMATS),
+                format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
+                horizontal=True
+            )
+            
+            # Runs on click in its own thread, after this run's profiler has finished.
+            # Streamlit sends download data as one in-memory payload, so the file
+            # is read whole; the cache saves rewriting it, not reading it
+            def export_file():
+                with open(export_cache.get(signature, export_format, dataset.frame, selection.rows()), 'rb') as f:
+                    return f.read()
+            
+            st.download_button(
+                label=f"📄 Download Filtered Data ({EXPORT_FORMATS[export_format]['label']})",
+                data=export_file,
+                file_name=f"pothole_data_{datetime.now().strftime('%Y%m%d')}{EXPORT_FORMATS[export_format]['extension']}",
+                mime=EXPORT_FORMATS[export_format]['mime'],
+                on_click="ignore",
+                use_container_width=True
+            )
+            
+            # Summary report - from the count cube, like the metrics and charts
+            sections = view_memo("report", signature, lambda: report_sections(summary))
+            
+            st.download_button(
+                label="📋 Download Summary Report",
+                data=lambda: summary_report(sections, datetime.now()),
+                file_name=f"pothole_summary_{datetime.now().strftime('%Y%m%d')}.txt",
+                mime="text/plain",
+                on_click="ignore",
+                use_container_width=True
+            )
+    
+    with col2:
+        st.markdown("### 📈 Quick Reports")
+        
+        if total > 0:
+            # Generate quick insights
+            st.markdown("**Key Insights:**")
+            
+            state_counts = summary.count_by('state')
+            st.write(f"• Most affected state: **{state_counts.index[0]}** ({state_counts.iloc[0]} reports)")
+            
+            critical_percentage = summary.count_of('severity', 'Critical') / total * 100
+            st.write(f"• Critical issues: **{critical_percentage:.1f}%** of all reports")
+            
+            completion_rate = summary.count_of('status', 'Completed') / total * 100
+            st.write(f"• Completion rate: **{completion_rate:.1f}%**")
+            
+            top_user = dataset.artifact('users', UserActivity).top(selection, 1)
+            st.write(f"• Most active reporter: **{top_user.index[0]}** ({top_user.iloc[0]} reports)")
+            
+            # Recent activity
+            recent_reports = summary.count_since(datetime.now() - timedelta(days=7))
+            st.write(f"• Reports in last 7 days: **{recent_reports}**")
+        
+        else:
+            st.info("No data available for reporting.")
+
+VIEWS = {
+    "🗺️ Map View": show_map_view,
+    "📈 Analytics": show_analytics_view,
+    "📋 Data Table": show_table_view,
+    "📊 Export & Reports": show_export_view,
+}
+
 # Main dashboard
-def show_dashboard():
+def show_dashboard(profiler):
     # Header with logout
     col1, col2, col3 = st.columns([1, 2, 1])
     with col1:
@@ -179,40 +745,120 @@ def show_dashboard():
             logout()
             st.rerun()
     
-    # Sidebar - File Upload
+    # Sidebar - Data source: a one-off upload, or the cumulative dataset store
     st.sidebar.header("📁 Data Upload")
-    uploaded_file = st.sidebar.file_uploader(
-        "Upload CSV file",
-        type=['csv'],
-        help="Upload pothole detection data from your mobile app"
-    )
-    
-    # Load and validate data
-    df = load_data(uploaded_file)
-    if df is None:
+    store = PotholeStore()
+    source = st.sidebar.radio("Data source", ["Upload CSV", "Dataset store", "Live feed"], horizontal=True)
+    
+    with profiler.stage("load") as stage:
+        if source == "Upload CSV":
+            uploaded_file = st.sidebar.file_uploader(
+                "Upload CSV file",
+                type=['csv'],
+                help="Upload pothole detection data from your mobile app"
+            )
+        
+            # Load and validate data (dates are parsed once at ingestion)
+            dataset = load_data(uploaded_file)
+        elif source == "Dataset store":
+            dataset = load_store_data(store)
+        else:
+            dataset = load_live_data()
+        stage.rows_out = len(dataset) if dataset is not None else 0
+    if dataset is None:
         return
     
-    # Handle empty dataframe (no file uploaded)
-    if df.empty:
-        st.sidebar.warning("📁 No data loaded. Please upload a CSV file.")
+    # Rejected rows first - when every row was rejected they are all there is to show
+    if len(dataset.rejected) > 0:
+        st.sidebar.warning(f"⚠️ Skipped {len(dataset.rejected)} invalid rows")
+        st.sidebar.download_button(
+            label="📥 Download Rejected Rows",
+            data=dataset.rejected.to_csv(index=False),
+            file_name="rejected_rows.csv",
+            mime="text/csv"
+        )
+    
+    # Handle empty dataset (no file uploaded, or no valid rows in it)
+    if dataset.empty:
+        if len(dataset.rejected) > 0:
+            st.sidebar.error("❌ No valid rows. Download the rejected rows to see why each was skipped.")
+        else:
+            st.sidebar.warning("📁 No data loaded. Please upload a CSV file.")
         show_upload_instructions()
         return
     
-    # Convert date column (only if data exists)
-    try:
-        df['date_detected'] = pd.to_datetime(df['date_detected'])
-    except Exception as e:
-        st.error(f"Error processing dates: {str(e)}")
-        return
+    df = dataset.frame
     
     # Display data info
     st.sidebar.success(f"✅ Loaded {len(df)} records")
     
+    # Merge the upload into the store (reports of known potholes replace the stored ones)
+    if source == "Upload CSV" and st.session_state.user_role == "admin":
+        if st.sidebar.button("💾 Save to Dataset Store", help="Append this upload to the persistent dataset store"):
+            try:
+                saved = store.append(df)
+                st.sidebar.success(f"✅ Saved {saved['rows']} records ({saved['replaced']} updated) "
+                                   f"across {saved['partitions']} partitions")
+            except Exception as e:
+                st.sidebar.error(f"Error saving to dataset store: {str(e)}")
+    
+    # States checked against a boundary file - the app's free-text state is often
+    # wrong or misspelled, but the bundled outlines are coarse, so disagreements
+    # are flagged and only replace `state` when asked to. Like the merged view
+    # below, the located view is a dataset of its own.
+    st.sidebar.header("🗺️ Locations")
+    if st.sidebar.toggle("Check states against coordinates",
+                         help="Compare each report's state with the state its coordinates fall in"):
+        apply = st.sidebar.checkbox(
+            "Use boundary-file states",
+            help="Replace the app's state with the boundary file's in filters, charts and exports, except "
+                 "near a state border; the app's value is kept as reported_state"
+        )
+        with profiler.stage("locate", rows_in=len(df)) as stage:
+            dataset = located_dataset(dataset, apply=apply)
+            stage.rows_out = len(dataset)
+        dataset.prebuild(PREBUILT_ARTIFACTS)
+        df = dataset.frame
+        checks = df['location_check'].value_counts()
+        disagree, outside = checks['Disagrees with boundary file'], checks['Outside boundary file']
+        near = checks['Near a border in boundary file']
+        st.sidebar.caption(f"{disagree} reports disagree with the boundary file, {near} more disagree near a "
+                           f"state border (never replaced), {outside} lie outside it. "
+                           f"{boundary_index().description}")
+        if disagree or near or outside:
+            st.sidebar.download_button(
+                label="📥 Download Flagged Rows",
+                data=lambda located=df: flagged_rows(located).to_csv(index=False),
+                file_name="location_flags.csv",
+                mime="text/csv",
+                on_click="ignore"
+            )
+    
+    # Near-duplicate reports - the merged view is a dataset of its own (with
+    # its own indexes), built once per dataset and settings
+    st.sidebar.header("🔁 Duplicates")
+    if st.sidebar.toggle("Merge duplicate reports",
+                         help="Count reports of the same pothole made close together in space and time once"):
+        col1, col2 = st.sidebar.columns(2)
+        with col1:
+            distance_m = st.number_input("Within (m)", min_value=1, max_value=500, value=DEDUPE_DISTANCE_M, step=5)
+        with col2:
+            window_minutes = st.number_input("Within (min)", min_value=1, max_value=24 * 60,
+                                             value=DEDUPE_WINDOW_MINUTES, step=15)
+        with profiler.stage("dedupe", rows_in=len(df)) as stage:
+            dataset = merged_dataset(dataset, distance_m, window_minutes)
+            stage.rows_out = len(dataset)
+        dataset.prebuild(PREBUILT_ARTIFACTS)
+        st.sidebar.caption(f"{len(df)} reports merged into {len(dataset)} potholes")
+        df = dataset.frame
+    
+    show_artifact_status(dataset)
+    
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     
     # State filter
-    states = ['All'] + sorted(df['state'].unique())
+    states = ['All'] + sorted(observed_levels(df['state']))
     selected_state = st.sidebar.selectbox("Select State", states)
     
     # Date range filter
@@ -223,356 +869,64 @@ def show_dashboard():
         end_date = st.date_input("To", df['date_detected'].max().date())
     
     # Multi-select filters
-    severities = st.sidebar.multiselect("Severity", df['severity'].unique(), 
-                                       default=df['severity'].unique())
-    statuses = st.sidebar.multiselect("Status", df['status'].unique(), 
-                                     default=df['status'].unique())
-    sizes = st.sidebar.multiselect("Size", df['size'].unique(), 
-                                  default=df['size'].unique())
-    
-    # Apply filters
-    filtered_df = df.copy()
-    
-    if selected_state != 'All':
-        filtered_df = filtered_df[filtered_df['state'] == selected_state]
-    
-    filtered_df = filtered_df[
-        (filtered_df['date_detected'].dt.date >= start_date) &
-        (filtered_df['date_detected'].dt.date <= end_date) &
-        (filtered_df['severity'].isin(severities)) &
-        (filtered_df['status'].isin(statuses)) &
-        (filtered_df['size'].isin(sizes))
-    ]
-    
-    # Key Metrics
-    st.header("📊 Overview")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.metric("Total Potholes", len(filtered_df))
-    
-    with col2:
-        critical_count = len(filtered_df[filtered_df['severity'] == 'Critical'])
-        st.metric("Critical Issues", critical_count,
-                 delta=f"{critical_count/len(filtered_df)*100:.1f}%" if len(filtered_df) > 0 else "0%")
-    
-    with col3:
-        new_count = len(filtered_df[filtered_df['status'] == 'New'])
-        st.metric("New Reports", new_count)
-    
-    with col4:
-        completed = len(filtered_df[filtered_df['status'] == 'Completed'])
-        completion_rate = completed/len(filtered_df)*100 if len(filtered_df) > 0 else 0
-        st.metric("Completion Rate", f"{completion_rate:.1f}%", f"{completed} completed")
-    
-    with col5:
-        unique_users = filtered_df['user_id'].nunique()
-        st.metric("Active Users", unique_users)
-    
-    # Main content tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["🗺️ Map View", "📈 Analytics", "📋 Data Table", "📊 Export & Reports"])
-    
-    with tab1:
-        st.subheader("Interactive Pothole Map")
-        
-        if len(filtered_df) > 0:
-            # Create folium map
-            center_lat = filtered_df['latitude'].mean()
-            center_lng = filtered_df['longitude'].mean()
-            
-            m = folium.Map(
-                location=[center_lat, center_lng], 
-                zoom_start=10,
-                tiles='OpenStreetMap'
-            )
-            
-            # Color mapping
-            color_map = {
-                'Low': 'green',
-                'Medium': 'orange',
-                'High': 'red', 
-                'Critical': 'darkred'
-            }
-            
-            # Size mapping
-            size_map = {
-                'Small': 6,
-                'Medium': 9,
-                'Large': 12
-            }
-            
-            # Add markers
-            for idx, row in filtered_df.iterrows():
-                folium.CircleMarker(
-                    location=[row['latitude'], row['longitude']],
-                    radius=size_map.get(row['size'], 8),
-                    popup=folium.Popup(f"""
-                    <div style='width:250px'>
-                    <b>🆔 {row['pothole_id']}</b><br>
-                    <b>📍 Location:</b> {row['address']}<br>
-                    <b>🏛️ State:</b> {row['state']}<br>
-                    <b>⚡ Severity:</b> {row['severity']}<br>
-                    <b>📏 Size:</b> {row['size']}<br>
-                    <b>📊 Status:</b> {row['status']}<br>
-                    <b>📅 Detected:</b> {row['date_detected'].strftime('%Y-%m-%d')} {row['time_detected']}<br>
-                    <b>👤 User:</b> {row['user_id']}
-                    </div>
-                    """, max_width=300),
-                    color=color_map.get(row['severity'], 'blue'),
-                    fill=True,
-                    fillColor=color_map.get(row['severity'], 'blue'),
-                    fillOpacity=0.8,
-                    weight=2
-                ).add_to(m)
-            
-            # Display map
-            st_folium(m, width=1200, height=500, returned_objects=["last_clicked"])
-            
-            # Legend
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown("**Severity Legend:**")
-                st.markdown("🟢 Low | 🟠 Medium | 🔴 High | 🟤 Critical")
-            with col2:
-                st.markdown("**Size Legend:**")
-                st.markdown("Small ● | Medium ●● | Large ●●●")
-            
-        else:
-            st.info("No potholes to display with current filters.")
+    severity_options = observed_levels(df['severity'])
+    status_options = observed_levels(df['status'])
+    size_options = observed_levels(df['size'])
+    severities = st.sidebar.multiselect("Severity", severity_options, 
+                                       default=severity_options)
+    statuses = st.sidebar.multiselect("Status", status_options, 
+                                     default=status_options)
+    sizes = st.sidebar.multiselect("Size", size_options, 
+                                  default=size_options)
+    
+    # Apply filters - bitmap index built once per dataset, no copy of the frame
+    filters = dict(
+        state=None if selected_state == 'All' else selected_state,
+        start_date=start_date,
+        end_date=end_date,
+        severities=severities,
+        statuses=statuses,
+        sizes=sizes
+    )
+    with profiler.stage("filter", rows_in=len(df)) as stage:
+        selection = dataset.artifact('filters', FilterEngine).select(**filters)
+        stage.rows_out = len(selection)
     
-    with tab2:
-        st.subheader("Analytics Dashboard")
-        
-        if len(filtered_df) > 0:
-            # Row 1: Distributions
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Severity distribution
-                severity_counts = filtered_df['severity'].value_counts()
-                fig_severity = px.pie(
-                    values=severity_counts.values,
-                    names=severity_counts.index,
-                    title="Distribution by Severity Level",
-                    color_discrete_map={
-                        'Low': '#22c55e',
-                        'Medium': '#f59e0b',
-                        'High': '#ef4444',
-                        'Critical': '#7f1d1d'
-                    }
-                )
-                fig_severity.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig_severity, use_container_width=True)
-            
-            with col2:
-                # Status distribution
-                status_counts = filtered_df['status'].value_counts()
-                fig_status = px.bar(
-                    x=status_counts.values,
-                    y=status_counts.index,
-                    orientation='h',
-                    title="Reports by Status",
-                    color=status_counts.index,
-                    color_discrete_map={
-                        'New': '#ef4444',
-                        'In Progress': '#f59e0b',
-                        'Completed': '#22c55e'
-                    }
-                )
-                fig_status.update_layout(showlegend=False)
-                st.plotly_chart(fig_status, use_container_width=True)
-            
-            # Row 2: Trends and Geography
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Time series
-                daily_reports = filtered_df.groupby(filtered_df['date_detected'].dt.date).size().reset_index()
-                daily_reports.columns = ['date', 'count']
-                
-                fig_timeline = px.line(
-                    daily_reports, 
-                    x='date', 
-                    y='count',
-                    title="Daily Pothole Reports Trend",
-                    markers=True
-                )
-                fig_timeline.update_layout(xaxis_title="Date", yaxis_title="Number of Reports")
-                st.plotly_chart(fig_timeline, use_container_width=True)
-            
-            with col2:
-                # State distribution
-                state_counts = filtered_df['state'].value_counts().head(10)
-                fig_states = px.bar(
-                    x=state_counts.values,
-                    y=state_counts.index,
-                    orientation='h',
-                    title="Top States by Pothole Reports",
-                    color=state_counts.values,
-                    color_continuous_scale='Reds'
-                )
-                fig_states.update_layout(showlegend=False, coloraxis_showscale=False)
-                st.plotly_chart(fig_states, use_container_width=True)
-            
-            # Row 3: Additional insights
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Size vs Severity heatmap
-                heatmap_data = filtered_df.groupby(['size', 'severity']).size().unstack(fill_value=0)
-                if not heatmap_data.empty:
-                    fig_heatmap = px.imshow(
-                        heatmap_data.values,
-                        x=heatmap_data.columns,
-                        y=heatmap_data.index,
-                        title="Size vs Severity Distribution",
-                        color_continuous_scale='Reds',
-                        text_auto=True
-                    )
-                    st.plotly_chart(fig_heatmap, use_container_width=True)
-            
-            with col2:
-                # User activity
-                user_activity = filtered_df['user_id'].value_counts().head(10)
-                fig_users = px.bar(
-                    x=user_activity.values,
-                    y=user_activity.index,
-                    orientation='h',
-                    title="Top 10 Most Active Users",
-                    color=user_activity.values,
-                    color_continuous_scale='Blues'
-                )
-                fig_users.update_layout(showlegend=False, coloraxis_showscale=False)
-                st.plotly_chart(fig_users, use_container_width=True)
-        
-        else:
-            st.info("No data available for analytics with current filters.")
+    # Counts for metrics, charts and reports come from the pre-aggregated cube
+    with profiler.stage("metrics", rows_in=len(df)) as stage:
+        summary = dataset.artifact('cube', CountCube).select(**filters)
+        total = summary.total
+        stage.rows_out = total
     
-    with tab3:
-        st.subheader("Pothole Data Table")
-        
-        if len(filtered_df) > 0:
-            # Search functionality
-            search_term = st.text_input("🔍 Search in table", placeholder="Search by ID, address, or user...")
-            
-            if search_term:
-                mask = (
-                    filtered_df['pothole_id'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['address'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['user_id'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['state'].str.contains(search_term, case=False, na=False)
-                )
-                display_df = filtered_df[mask]
-            else:
-                display_df = filtered_df
-            
-            # Column selection
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write(f"Showing {len(display_df)} of {len(filtered_df)} records")
-            with col2:
-                if st.session_state.user_role == "admin":
-                    if st.button("📝 Edit Mode", help="Enable editing for admin users"):
-                        st.info("Edit mode would be implemented here for admin users")
-            
-            # Display table
-            st.dataframe(
-                display_df.style.format({
-                    'latitude': '{:.6f}',
-                    'longitude': '{:.6f}',
-                    'date_detected': lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else ''
-                }),
-                use_container_width=True,
-                height=400
-            )
-            
-            # Quick stats for filtered data
-            if len(display_df) > 0:
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Filtered Records", len(display_df))
-                with col2:
-                    st.metric("Unique States", display_df['state'].nunique())
-                with col3:
-                    st.metric("Critical Issues", len(display_df[display_df['severity'] == 'Critical']))
-                with col4:
-                    st.metric("Unique Users", display_df['user_id'].nunique())
-        
-        else:
-            st.info("No data matches current filters.")
+        # Key Metrics
+        st.header("📊 Overview")
+        col1, col2, col3, col4, col5 = st.columns(5)
     
-    with tab4:
-        st.subheader("📊 Export & Reports")
-        
-        col1, col2 = st.columns(2)
-        
         with col1:
-            st.markdown("### 📥 Data Export")
-            
-            if len(filtered_df) > 0:
-                # Export CSV
-                csv_data = filtered_df.to_csv(index=False)
-                st.download_button(
-                    label="📄 Download Filtered Data (CSV)",
-                    data=csv_data,
-                    file_name=f"pothole_data_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-                
-                # Summary report
-                summary_report = f"""# Pothole Detection Report
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## Summary Statistics
-- Total Potholes: {len(filtered_df)}
-- States Covered: {filtered_df['state'].nunique()}
-- Date Range: {filtered_df['date_detected'].min().strftime('%Y-%m-%d')} to {filtered_df['date_detected'].max().strftime('%Y-%m-%d')}
-
-## Severity Breakdown
-{filtered_df['severity'].value_counts().to_string()}
-
-## Status Overview  
-{filtered_df['status'].value_counts().to_string()}
-
-## Top 5 States
-{filtered_df['state'].value_counts().head().to_string()}
-"""
-                
-                st.download_button(
-                    label="📋 Download Summary Report",
-                    data=summary_report,
-                    file_name=f"pothole_summary_{datetime.now().strftime('%Y%m%d')}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                )
-        
+            st.metric("Total Potholes", total)
+    
         with col2:
-            st.markdown("### 📈 Quick Reports")
-            
-            if len(filtered_df) > 0:
-                # Generate quick insights
-                st.markdown("**Key Insights:**")
-                
-                most_affected_state = filtered_df['state'].value_counts().index[0]
-                st.write(f"• Most affected state: **{most_affected_state}** ({filtered_df['state'].value_counts().iloc[0]} reports)")
-                
-                critical_percentage = len(filtered_df[filtered_df['severity'] == 'Critical']) / len(filtered_df) * 100
-                st.write(f"• Critical issues: **{critical_percentage:.1f}%** of all reports")
-                
-                completion_rate = len(filtered_df[filtered_df['status'] == 'Completed']) / len(filtered_df) * 100
-                st.write(f"• Completion rate: **{completion_rate:.1f}%**")
-                
-                most_active_user = filtered_df['user_id'].value_counts().index[0]
-                user_reports = filtered_df['user_id'].value_counts().iloc[0]
-                st.write(f"• Most active reporter: **{most_active_user}** ({user_reports} reports)")
-                
-                # Recent activity
-                recent_reports = len(filtered_df[filtered_df['date_detected'] >= (datetime.now() - timedelta(days=7))])
-                st.write(f"• Reports in last 7 days: **{recent_reports}**")
-            
-            else:
-                st.info("No data available for reporting.")
+            critical_count = summary.count_of('severity', 'Critical')
+            st.metric("Critical Issues", critical_count,
+                     delta=f"{critical_count/total*100:.1f}%" if total > 0 else "0%")
+    
+        with col3:
+            new_count = summary.count_of('status', 'New')
+            st.metric("New Reports", new_count)
+    
+        with col4:
+            completed = summary.count_of('status', 'Completed')
+            completion_rate = completed/total*100 if total > 0 else 0
+            st.metric("Completion Rate", f"{completion_rate:.1f}%", f"{completed} completed")
+    
+        with col5:
+            unique_users = summary.distinct_users()
+            st.metric("Active Users", unique_users)
+    
+    # Main content - unlike st.tabs, only the selected view runs
+    view_name = st.segmented_control("View", list(VIEWS), default=list(VIEWS)[0], key="active_view",
+                                     label_visibility="collapsed")
+    VIEWS[view_name or list(VIEWS)[0]](profiler, dataset, selection, summary, (dataset.key, filter_key(filters)))
 
 # Main app flow
 def main():
@@ -581,7 +935,18 @@ def main():
     if not st.session_state.authenticated:
         show_login()
     else:
-        show_dashboard()
+        # Every run is timed per stage; admins can also trace memory and payload sizes
+        profiler = RunProfiler(
+            session=get_session_id(),
+            user=st.session_state.username,
+            detailed=st.session_state.get("perf_detailed", PERF_DETAILED)
+        )
+        try:
+            show_dashboard(profiler)
+        finally:
+            profiler.finish()
+        if st.session_state.user_role == "admin":
+            show_perf_panel(profiler)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,484 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Schema shared by the dashboard and any headless tooling
+REQUIRED_COLUMNS = ['pothole_id', 'latitude', 'longitude', 'state', 'address',
+                    'size', 'severity', 'date_detected', 'time_detected', 'user_id', 'status']
+
+# Known category levels, in display order (severity from least to most urgent)
+SIZE_LEVELS = ['Small', 'Medium', 'Large']
+SEVERITY_LEVELS = ['Low', 'Medium', 'High', 'Critical']
+STATUS_LEVELS = ['New', 'In Progress', 'Completed']
+
+CATEGORY_LEVELS = {
+    'state': [],
+    'size': SIZE_LEVELS,
+    'severity': SEVERITY_LEVELS,
+    'status': STATUS_LEVELS,
+}
+
+# Repetitive text columns stored as categoricals after validation
+COMPACT_CATEGORY_COLUMNS = ['state', 'size', 'severity', 'status', 'time_detected', 'user_id']
+
+# Streaming ingestion: rows parsed per chunk, and the ceiling on memory held
+# by accepted + rejected rows, plus the uploaded file itself when it is held in
+# memory (POTHOLE_MEMORY_LIMIT_MB, 0 disables). Parsed rows take roughly 0.8x
+# the CSV's size, so an upload needs about 1.8x its size: the upload limit in
+# .streamlit/config.toml is set to half of this default.
+CHUNK_ROWS = 100_000
+MEMORY_LIMIT_BYTES = int(os.environ.get('POTHOLE_MEMORY_LIMIT_MB', 4096)) * 1024 * 1024
+HASH_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Parsed datasets (with their indexes) are shared by all sessions, keyed by
+# content hash, within a memory budget (POTHOLE_DATASET_CACHE_MB). A session
+# holds the dataset it is viewing until it moves on or goes quiet for
+# SESSION_TTL_SECONDS; only datasets nobody holds are evicted.
+DATASET_CACHE_MAX_BYTES = int(os.environ.get('POTHOLE_DATASET_CACHE_MB', 2048)) * 1024 * 1024
+SESSION_TTL_SECONDS = 30 * 60
+
+# Artifacts are also built in the background as soon as a dataset is loaded
+# (see PotholeDataset.prebuild). Threads rather than processes: the builds
+# read the shared frame, and shipping it (and the index back) to another
+# process costs more than the build. Two workers keep the first, cheap
+# artifacts from competing with the slow ones for the GIL.
+ARTIFACT_WORKERS = int(os.environ.get('POTHOLE_ARTIFACT_WORKERS', 2))
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing_cols):
+        self.missing_cols = missing_cols
+        super().__init__(f"Missing required columns: {', '.join(missing_cols)}")
+
+
+class MemoryLimitExceeded(MemoryError):
+    def __init__(self, limit_bytes, rows_read, file_bytes=None):
+        self.limit_bytes = limit_bytes
+        self.rows_read = rows_read
+        if file_bytes is not None:
+            super().__init__(f"Upload of {file_bytes // (1024 * 1024)} MB exceeds the "
+                             f"{limit_bytes // (1024 * 1024)} MB memory limit on its own")
+        else:
+            super().__init__(f"Upload exceeds the {limit_bytes // (1024 * 1024)} MB memory limit "
+                             f"(stopped after {rows_read:,} rows)")
+
+
+artifact_pool = ThreadPoolExecutor(max_workers=ARTIFACT_WORKERS, thread_name_prefix='pothole-artifacts')
+
+
+# A parsed dataset plus the indexes/aggregates derived from it, built on first
+# use or ahead of time in the background
+class PotholeDataset:
+    def __init__(self, key, frame, rejected=None):
+        self.key = key
+        self.frame = frame
+        self.rejected = rejected if rejected is not None else pd.DataFrame(columns=['row_number', 'reason'])
+        self._artifacts = {}
+        self._building = {}
+        # name -> pool future of a queued background build
+        self._queued = {}
+        self._failed = {}
+        self._retired = False
+        self._lock = threading.Lock()
+        self.frame_nbytes = int(frame.memory_usage(deep=True).sum()) + int(self.rejected.memory_usage(deep=True).sum())
+
+    # Built artifact, building it here unless another thread already is (then
+    # its result is awaited). Different artifacts build concurrently.
+    def artifact(self, name, build):
+        with self._lock:
+            if name in self._artifacts:
+                return self._artifacts[name]
+            future = self._building.get(name)
+            owner = future is None
+            if owner:
+                future = self._building[name] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            value = build(self.frame)
+        except BaseException as e:
+            with self._lock:
+                del self._building[name]
+                self._failed[name] = str(e)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._artifacts[name] = value
+            del self._building[name]
+            self._failed.pop(name, None)
+        future.set_result(value)
+        return value
+
+    # Built artifact or None, never waiting
+    def peek(self, name):
+        return self._artifacts.get(name)
+
+    # Queue background builds (in `builds` order) of artifacts not built,
+    # building or queued yet. A queued artifact asked for in the meantime is
+    # built by the caller; the queued job then finds it done. Jobs hold the
+    # dataset weakly, so a queued job does not keep a dropped dataset alive.
+    def prebuild(self, builds, pool=None):
+        pool = pool or artifact_pool
+        with self._lock:
+            if self._retired:
+                return
+            names = [name for name in builds if name not in self._artifacts and name not in self._building
+                     and name not in self._queued and name not in self._failed]
+            for name in names:
+                self._queued[name] = pool.submit(_background_build, weakref.ref(self), name, builds[name])
+
+    # Drop queued background builds, here and in datasets derived from this
+    # one, and queue no more: the dataset has been superseded (a newer live
+    # generation). Builds already running finish; foreground requests still build.
+    def retire(self):
+        with self._lock:
+            self._retired = True
+            queued, self._queued = self._queued, {}
+            derived = [artifact for artifact in self._artifacts.values() if isinstance(artifact, PotholeDataset)]
+        for future in queued.values():
+            future.cancel()
+        for dataset in derived:
+            dataset.retire()
+
+    def _dequeue(self, name):
+        with self._lock:
+            self._queued.pop(name, None)
+            return not self._retired
+
+    # 'ready', 'building', 'queued', 'failed' or None (never requested)
+    def status(self, name):
+        with self._lock:
+            if name in self._artifacts:
+                return 'ready'
+            if name in self._building:
+                return 'building'
+            if name in self._queued:
+                return 'queued'
+            if name in self._failed:
+                return 'failed'
+        return None
+
+    def ready(self, names):
+        return all(name in self._artifacts for name in names)
+
+    # Frame plus every artifact built so far (indexes report their own nbytes).
+    # Not under the lock, which is taken by every status check; copying the
+    # values is atomic.
+    @property
+    def nbytes(self):
+        artifacts = tuple(self._artifacts.values())
+        return self.frame_nbytes + sum(int(getattr(artifact, 'nbytes', 0)) for artifact in artifacts)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+
+def _background_build(dataset_ref, name, build):
+    dataset = dataset_ref()
+    if dataset is None or not dataset._dequeue(name):
+        return
+    try:
+        dataset.artifact(name, build)
+    except Exception:
+        # Kept in _failed for status(); a foreground request retries and reports it
+        pass
+
+
+def content_hash(source):
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+# Categoricals keep the known levels first so codes follow severity/size order;
+# unexpected values are kept (appended) rather than silently turned into NaN
+def as_category(values, levels):
+    values = values.astype('category')
+    extra = sorted(c for c in values.cat.categories if c not in levels)
+    return values.cat.set_categories(list(levels) + extra)
+
+
+def observed_levels(values):
+    counts = np.bincount(values.cat.codes[values.cat.codes >= 0],
+                         minlength=len(values.cat.categories))
+    return [level for level, count in zip(values.cat.categories, counts) if count > 0]
+
+
+def parse_dates(dates):
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    # Anything not in the documented YYYY-MM-DD format gets a slower second pass
+    retry = parsed.isna() & dates.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(dates[retry], format='mixed', errors='coerce')
+    return parsed
+
+
+def parse_times(times):
+    times = times.fillna('').astype(str).str.strip()
+    times = times.where(times.str.count(':') != 1, times + ':00')
+    return pd.to_timedelta(times, errors='coerce')
+
+
+def parse_timestamps(dates, times):
+    parsed = parse_dates(dates)
+    return parsed, parsed + parse_times(times).fillna(pd.Timedelta(0))
+
+
+def coerce_schema(df):
+    for col, levels in CATEGORY_LEVELS.items():
+        df[col] = as_category(df[col], levels)
+    for col in ('latitude', 'longitude'):
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    df['date_detected'], df['detected_at'] = parse_timestamps(df['date_detected'], df['time_detected'])
+    return df
+
+
+# Row-level checks on a raw (all-string) chunk; returns the parsed values
+# alongside a per-row rejection reason ('' for valid rows)
+def validate_chunk(chunk):
+    latitude = pd.to_numeric(chunk['latitude'], errors='coerce')
+    longitude = pd.to_numeric(chunk['longitude'], errors='coerce')
+    dates = parse_dates(chunk['date_detected'])
+    times = parse_times(chunk['time_detected'])
+
+    def blank(col):
+        return chunk[col].isna() | (chunk[col].str.strip() == '')
+
+    checks = [
+        ('missing pothole_id', blank('pothole_id')),
+        ('invalid latitude', ~latitude.between(-90, 90)),
+        ('invalid longitude', ~longitude.between(-180, 180)),
+        ('missing state', blank('state')),
+        ('unknown size', ~chunk['size'].isin(SIZE_LEVELS)),
+        ('unknown severity', ~chunk['severity'].isin(SEVERITY_LEVELS)),
+        ('invalid date_detected', dates.isna()),
+        ('invalid time_detected', times.isna()),
+        ('missing user_id', blank('user_id')),
+        ('unknown status', ~chunk['status'].isin(STATUS_LEVELS)),
+    ]
+    reasons = np.full(len(chunk), '', dtype=object)
+    for reason, failed in checks:
+        failed = failed.to_numpy()
+        reasons[failed] = reasons[failed] + np.where(reasons[failed] == '', reason, '; ' + reason)
+
+    parsed = {'latitude': latitude, 'longitude': longitude, 'date_detected': dates, 'time': times}
+    return parsed, reasons
+
+
+# Valid rows of a chunk in their compact in-memory dtypes
+def compact_chunk(chunk, parsed):
+    df = chunk.copy()
+    df['latitude'] = parsed['latitude'].astype('float64')
+    df['longitude'] = parsed['longitude'].astype('float64')
+    df['date_detected'] = parsed['date_detected']
+    df['detected_at'] = parsed['date_detected'] + parsed['time']
+    for col in COMPACT_CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def combine_chunks(chunks, columns):
+    if not chunks:
+        empty = pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+        return coerce_schema(empty)
+    df = pd.concat(chunks, ignore_index=True)
+    # Chunks carry their own category sets; union them instead of falling back to
+    # object. Sorted, so category codes order like the values (the Data Table sorts by code)
+    for col in COMPACT_CATEGORY_COLUMNS:
+        df[col] = union_categoricals([chunk[col] for chunk in chunks], sort_categories=True).astype('category')
+    for col, levels in CATEGORY_LEVELS.items():
+        df[col] = as_category(df[col], levels)
+    return df
+
+
+# With count_source, the source's own bytes (an upload held in memory) count
+# against memory_limit too
+def read_pothole_csv(source, chunk_rows=CHUNK_ROWS, memory_limit=MEMORY_LIMIT_BYTES, progress=None,
+                     count_source=False):
+    header = pd.read_csv(source, nrows=0)
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in header.columns]
+    if missing_cols:
+        raise MissingColumnsError(missing_cols)
+
+    total_bytes = source.seek(0, io.SEEK_END) or 1
+    source.seek(0)
+    if count_source and memory_limit and total_bytes > memory_limit:
+        raise MemoryLimitExceeded(memory_limit, 0, file_bytes=total_bytes)
+
+    accepted, rejected = [], []
+    rows_read = 0
+    used_bytes = total_bytes if count_source else 0
+    for chunk in pd.read_csv(source, dtype=str, chunksize=chunk_rows):
+        chunk.index = pd.RangeIndex(rows_read, rows_read + len(chunk))
+        rows_read += len(chunk)
+
+        parsed, reasons = validate_chunk(chunk)
+        valid = reasons == ''
+        if valid.any():
+            accepted.append(compact_chunk(chunk[valid], {k: v[valid] for k, v in parsed.items()}))
+            used_bytes += accepted[-1].memory_usage(deep=True).sum()
+        if not valid.all():
+            bad = chunk[~valid].copy()
+            # Line number in the uploaded file (line 1 is the header)
+            bad.insert(0, 'row_number', bad.index + 2)
+            bad['reason'] = reasons[~valid]
+            rejected.append(bad)
+            used_bytes += bad.memory_usage(deep=True).sum()
+
+        if memory_limit and used_bytes > memory_limit:
+            raise MemoryLimitExceeded(memory_limit, rows_read)
+        if progress is not None:
+            progress(min(source.tell() / total_bytes, 1.0), rows_read)
+
+    frame = combine_chunks(accepted, header.columns)
+    report = (pd.concat(rejected, ignore_index=True) if rejected
+              else pd.DataFrame(columns=['row_number', *header.columns, 'reason']))
+    return frame, report
+
+
+def empty_dataset():
+    frame = pd.DataFrame(columns=REQUIRED_COLUMNS)
+    return PotholeDataset('empty', frame)
+
+
+# Dataset cache - Streamlit reruns the script on every interaction, but this
+# module is imported once per process, so parsed frames survive across reruns
+# and are shared read-only by every session that opens the same content
+class DatasetCache:
+    def __init__(self, max_bytes=DATASET_CACHE_MAX_BYTES, session_ttl=SESSION_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self._datasets = OrderedDict()
+        # key -> Future of a build in progress, awaited by later callers
+        self._building = {}
+        # session -> (dataset key, last seen)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    # Cached dataset for `key`, built with build(key) on a miss. `session`
+    # (any hashable id) holds it, releasing whatever that session held before.
+    # Sessions asking for a key that is being built wait for that build
+    # instead of parsing their own copy.
+    def get(self, key, build, session=None):
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is not None:
+                self._datasets.move_to_end(key)
+                self._hold(key, session)
+                self._evict()
+                return dataset
+            future = self._building.get(key)
+            owner = future is None
+            if owner:
+                future = self._building[key] = Future()
+
+        if owner:
+            # Parsed outside the lock so other keys and cache hits are not blocked
+            try:
+                dataset = build(key)
+            except BaseException as e:
+                with self._lock:
+                    del self._building[key]
+                future.set_exception(e)
+                raise
+            with self._lock:
+                self._datasets[key] = dataset
+                del self._building[key]
+            future.set_result(dataset)
+        else:
+            dataset = future.result()
+
+        with self._lock:
+            if key in self._datasets:
+                self._datasets.move_to_end(key)
+            self._hold(key, session)
+            self._evict()
+        return dataset
+
+    def _hold(self, key, session):
+        if session is not None:
+            self._sessions[session] = (key, time.monotonic())
+
+    def release(self, session):
+        with self._lock:
+            self._sessions.pop(session, None)
+
+    def _held(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session, (_, seen) in list(self._sessions.items()):
+            if seen < cutoff:
+                del self._sessions[session]
+        return {key for key, _ in self._sessions.values()}
+
+    # Least recently used datasets nobody holds go first; held datasets are
+    # kept even over budget, since their sessions would just load them again
+    def _evict(self):
+        held = self._held()
+        total = sum(dataset.nbytes for dataset in self._datasets.values())
+        for key in list(self._datasets):
+            if total <= self.max_bytes:
+                break
+            if key not in held:
+                total -= self._datasets.pop(key).nbytes
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            held = self._held()
+            datasets = [{
+                'key': key,
+                'rows': len(dataset),
+                'bytes': dataset.nbytes,
+                'sessions': sum(1 for k, _ in self._sessions.values() if k == key),
+                'held': key in held,
+            } for key, dataset in self._datasets.items()]
+        return {
+            'datasets': datasets,
+            'bytes': sum(d['bytes'] for d in datasets),
+            'max_bytes': self.max_bytes,
+            'sessions': len(self._sessions),
+            'evictions': self.evictions,
+        }
+
+
+dataset_cache = DatasetCache()
+
+
+def cached_dataset(key, build, session=None):
+    return dataset_cache.get(key, build, session=session)
+
+
+# `key` is the content hash when the caller already has it (hashing a large
+# upload on every rerun is not free)
+def load_dataset(source, progress=None, memory_limit=MEMORY_LIMIT_BYTES, session=None, key=None):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    def build(key):
+        # In-memory uploads are held alongside what is parsed from them
+        frame, rejected = read_pothole_csv(source, memory_limit=memory_limit, progress=progress,
+                                           count_source=isinstance(source, io.BytesIO))
+        return PotholeDataset(key, frame, rejected)
+
+    return cached_dataset(key or content_hash(source), build, session=session)
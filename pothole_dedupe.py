@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from pothole_data import PotholeDataset
+from pothole_spatial import METRES_PER_DEGREE, haversine_m
+
+# Near-duplicate reports: the same pothole reported again (often by another
+# user) within DEDUPE_DISTANCE_M metres and DEDUPE_WINDOW_MINUTES of an earlier
+# report. Reports are bucketed into cells at least that wide in space and time,
+# so every duplicate pair sits in the same or an adjacent bucket; only those
+# pairs are measured. Matches are chained - A~B and B~C puts A, B and C in one
+# group - and each group keeps its earliest report as the canonical pothole.
+DEDUPE_DISTANCE_M = 25
+DEDUPE_WINDOW_MINUTES = 60
+
+# Candidate pairs are generated for this many reports at a time (bounds memory
+# when many reports share a bucket)
+PAIR_BATCH_ROWS = 250_000
+
+# Bucket offsets (lat, lng, time) checked for each report; the other half of
+# the 26 neighbours is covered from the other side of each pair
+NEIGHBOUR_OFFSETS = [(dy, dx, dt) for dy in (-1, 0, 1) for dx in (-1, 0, 1) for dt in (-1, 0, 1)
+                     if (dy, dx, dt) > (0, 0, 0)]
+
+
+# Bucket key per report; each dimension is padded by one so neighbours never wrap
+def bucket_keys(lat, lng, ns, distance_m, window_ns):
+    cell_lat = distance_m / METRES_PER_DEGREE
+    # Longitude cells are widest (in metres) at the equator; size them for the
+    # highest latitude present so they are at least distance_m wide everywhere
+    cell_lng = cell_lat / np.cos(np.radians(min(np.abs(lat).max(), 89.0)))
+    coords = [np.floor(lat / cell_lat), np.floor(lng / cell_lng), np.floor_divide(ns, window_ns)]
+    coords = [values.astype(np.int64) - values.min().astype(np.int64) + 1 for values in coords]
+    widths = [int(values.max()) + 2 for values in coords]
+    # Small tolerances over a wide area or many years (1 m and 1 minute over a
+    # country and several years) overflow an int64 key; doubling the cells of
+    # the widest dimension until it fits only adds candidate pairs
+    while widths[0] * widths[1] * widths[2] >= 2 ** 62:
+        widest = int(np.argmax(widths))
+        coords[widest] = (coords[widest] + 1) // 2
+        widths[widest] = int(coords[widest].max()) + 2
+    keys = np.zeros(len(lat), dtype=np.int64)
+    for values, width in zip(coords, widths):
+        keys = keys * width + values
+    return keys, widths
+
+
+# Duplicate pairs (positions into the sorted arrays) among reports whose
+# buckets are `delta` apart; delta 0 pairs each report with later ones only
+def bucket_pairs(keys, delta, lat, lng, ns, distance_m, window_ns):
+    pairs = []
+    for start in range(0, len(keys), PAIR_BATCH_ROWS):
+        batch = np.arange(start, min(start + PAIR_BATCH_ROWS, len(keys)))
+        hi = np.searchsorted(keys, keys[batch] + delta, side='right')
+        lo = batch + 1 if delta == 0 else np.searchsorted(keys, keys[batch] + delta, side='left')
+        lengths = hi - lo
+        total = int(lengths.sum())
+        if total == 0:
+            continue
+        left = np.repeat(batch, lengths)
+        right = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        close = ((np.abs(ns[left] - ns[right]) <= window_ns)
+                 & (haversine_m(lat[left], lng[left], lat[right], lng[right]) <= distance_m))
+        pairs.append((left[close], right[close]))
+    return pairs
+
+
+# Connected components by label propagation: every report takes the smallest
+# label among its matches, then labels point-jump to their root, until stable
+def propagate_labels(n, left, right):
+    labels = np.arange(n)
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, lowest)
+        np.minimum.at(updated, right, lowest)
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+# Canonical row position for every row (itself when it has no duplicates).
+# Rows without coordinates or a timestamp are never merged.
+def duplicate_groups(df, distance_m=DEDUPE_DISTANCE_M, window_minutes=DEDUPE_WINDOW_MINUTES):
+    canonical = np.arange(len(df))
+    lat = df['latitude'].to_numpy(dtype=np.float64)
+    lng = df['longitude'].to_numpy(dtype=np.float64)
+    detected = df['detected_at'].to_numpy(dtype='datetime64[ns]')
+    rows = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng) & ~np.isnat(detected))
+    if len(rows) < 2:
+        return canonical
+
+    window_ns = int(window_minutes * 60 * 1_000_000_000)
+    lat, lng, ns = lat[rows], lng[rows], detected[rows].view(np.int64)
+    keys, (_, width_lng, width_time) = bucket_keys(lat, lng, ns, distance_m, window_ns)
+    order = np.argsort(keys, kind='stable')
+    keys, lat, lng, ns, rows = keys[order], lat[order], lng[order], ns[order], rows[order]
+
+    pairs = [(np.array([], dtype=np.int64), np.array([], dtype=np.int64))]
+    for dy, dx, dt in [(0, 0, 0)] + NEIGHBOUR_OFFSETS:
+        delta = (dy * width_lng + dx) * width_time + dt
+        pairs.extend(bucket_pairs(keys, delta, lat, lng, ns, distance_m, window_ns))
+    left = np.concatenate([pair[0] for pair in pairs])
+    right = np.concatenate([pair[1] for pair in pairs])
+    if not len(left):
+        return canonical
+
+    # Earliest report of each group (then lowest row) becomes its canonical row
+    labels = propagate_labels(len(rows), left, right)
+    first = np.lexsort((rows, ns, labels))
+    is_first = np.r_[True, labels[first][1:] != labels[first][:-1]]
+    root_row = np.empty(len(rows), dtype=np.int64)
+    root_row[labels[first][is_first]] = rows[first][is_first]
+    canonical[rows] = root_row[labels]
+    return canonical
+
+
+# One row per pothole: the canonical report plus how many reports it stands
+# for and every user who reported it
+def merge_duplicates(df, canonical):
+    report_count = np.bincount(canonical, minlength=len(df))
+    keep = np.flatnonzero(report_count > 0)
+    merged = df.take(keep).reset_index(drop=True)
+    merged['report_count'] = report_count[keep].astype(np.int32)
+
+    user_ids = df['user_id'].take(keep).astype(str).to_numpy(dtype=object)
+    repeated = np.flatnonzero(report_count[keep] > 1)
+    if len(repeated):
+        in_group = report_count[canonical] > 1
+        reporters = pd.DataFrame({'group': canonical[in_group],
+                                  'user_id': df['user_id'].to_numpy()[in_group].astype(str)})
+        reporters = reporters.drop_duplicates().sort_values('group', kind='stable')
+        # Groups are consecutive after the sort; plain str.join per group beats groupby.agg
+        group = reporters['group'].to_numpy()
+        names = np.split(reporters['user_id'].to_numpy(dtype=object), np.flatnonzero(np.diff(group)) + 1)
+        user_ids[repeated] = [', '.join(group_names) for group_names in names]
+    merged['user_ids'] = user_ids
+    return merged
+
+
+# Merged counterpart of a dataset, cached on it like any other index
+def merged_dataset(dataset, distance_m=DEDUPE_DISTANCE_M, window_minutes=DEDUPE_WINDOW_MINUTES):
+    def build(frame):
+        merged = merge_duplicates(frame, duplicate_groups(frame, distance_m, window_minutes))
+        return PotholeDataset(f"{dataset.key}:merged:{distance_m}m:{window_minutes}min", merged, dataset.rejected)
+    return dataset.artifact(f"merged:{distance_m}:{window_minutes}", build)
@@ -0,0 +1,125 @@
+import csv
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Filtered-data exports, written on request in row chunks straight to disk (the
+# selection is never copied out of the dataset as one frame or one string) and
+# kept per dataset + filter signature + format, so repeat downloads are free.
+# Files live under POTHOLE_EXPORT_DIR; the oldest are deleted past the budget.
+EXPORT_FORMATS = {
+    'csv': {'label': 'CSV', 'extension': '.csv', 'mime': 'text/csv'},
+    'csv.gz': {'label': 'CSV (gzip)', 'extension': '.csv.gz', 'mime': 'application/gzip'},
+    'parquet': {'label': 'Parquet', 'extension': '.parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+EXPORT_CHUNK_ROWS = 200_000
+# Level 6 is about twice as fast as gzip's default 9 for ~3% larger files
+GZIP_LEVEL = 6
+EXPORT_DIR = os.environ.get('POTHOLE_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'pothole_exports'))
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get('POTHOLE_EXPORT_CACHE_MB', 2048)) * 1024 * 1024
+
+
+def row_chunks(rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(rows), chunk_rows):
+        yield rows[start:start + chunk_rows]
+
+
+def write_csv(df, rows, path, compress=False):
+    if compress:
+        out = gzip.open(path, 'wt', newline='', encoding='utf-8', compresslevel=GZIP_LEVEL)
+    else:
+        out = open(path, 'w', newline='', encoding='utf-8')
+    with out:
+        for i, chunk in enumerate(row_chunks(rows)):
+            df.take(chunk).to_csv(out, index=False, header=i == 0, quoting=csv.QUOTE_MINIMAL)
+        if not len(rows):
+            df.head(0).to_csv(out, index=False)
+
+
+def write_parquet(df, rows, path):
+    schema = pa.Schema.from_pandas(df.head(0), preserve_index=False)
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for chunk in row_chunks(rows):
+            writer.write_table(pa.Table.from_pandas(df.take(chunk), schema=schema, preserve_index=False))
+
+
+def write_export(df, rows, fmt, path):
+    if fmt == 'parquet':
+        write_parquet(df, rows, path)
+    else:
+        write_csv(df, rows, path, compress=fmt == 'csv.gz')
+
+
+class ExportCache:
+    def __init__(self, directory=EXPORT_DIR, max_bytes=EXPORT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # path -> Future of an export being written; the lock only guards this
+        # dict and the trim, never a write
+        self._writing = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, key, fmt):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, digest + EXPORT_FORMATS[fmt]['extension'])
+
+    # Path of the export for `key` (dataset key + filter key), writing it first
+    # if needed. Requests for an export being written wait for that write;
+    # other exports and cache hits go ahead.
+    def get(self, key, fmt, df, rows):
+        path = self.path_for(key, fmt)
+        with self._lock:
+            future = self._writing.get(path)
+            owner = future is None and not os.path.exists(path)
+            if owner:
+                future = self._writing[path] = Future()
+        if future is not None and not owner:
+            return future.result()
+        if not owner:
+            os.utime(path)
+            return path
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Written under a temporary name so a half-written file is never served
+            partial = f"{path}.{os.getpid()}.partial"
+            try:
+                write_export(df, rows, fmt, partial)
+                os.replace(partial, path)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+        except BaseException as e:
+            with self._lock:
+                del self._writing[path]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._writing[path]
+            self._trim(keep=path)
+        future.set_result(path)
+        return path
+
+    # Least recently used files go first (mtime is refreshed on every hit)
+    def _trim(self, keep):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.partial'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path != keep:
+                os.remove(path)
+                total -= size
+
+
+export_cache = ExportCache()
@@ -0,0 +1,152 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Sidebar filters backed by a per-value bitmap
+BITMAP_COLUMNS = ['state', 'severity', 'status', 'size']
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def to_day_ns(value):
+    return pd.Timestamp(value).normalize().value
+
+
+# Row selection over a dataset, stored as packed bits (None means every row)
+class Selection:
+    def __init__(self, n_rows, bits=None):
+        self.n_rows = n_rows
+        self.bits = bits
+        self._rows = None
+
+    @property
+    def all(self):
+        return self.bits is None
+
+    def mask(self):
+        if self.bits is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(self.bits, count=self.n_rows).view(bool)
+
+    def rows(self):
+        if self._rows is None:
+            self._rows = np.arange(self.n_rows) if self.bits is None else np.flatnonzero(self.mask())
+        return self._rows
+
+    def __len__(self):
+        return len(self.rows())
+
+    # Membership test for arbitrary row positions without unpacking every bit
+    def contains(self, rows):
+        if self.bits is None:
+            return np.ones(len(rows), dtype=bool)
+        return ((self.bits[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+    def take(self, df):
+        return df if self.bits is None else df.take(self.rows())
+
+
+class FilterEngine:
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        self.complete = {}
+        for col in BITMAP_COLUMNS:
+            codes = df[col].cat.codes.to_numpy()
+            self.complete[col] = bool((codes >= 0).all())
+            self.bitmaps[col] = {}
+            for code, level in enumerate(df[col].cat.categories):
+                hits = codes == code
+                if hits.any():
+                    self.bitmaps[col][level] = np.packbits(hits)
+
+        # Timestamps sorted once; date ranges become two binary searches
+        days = df['date_detected'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        self.order = np.argsort(days, kind='stable')
+        self.sorted_days = days[self.order]
+
+    # Engine for df: the indexed frame with the rows at `replaced` rewritten
+    # and new rows appended. Only those rows are read; the bitmaps are
+    # unpacked, patched and repacked, and their dates merged into the order.
+    def updated(self, df, replaced):
+        engine = copy.copy(self)
+        n_old = self.n_rows
+        engine.n_rows = len(df)
+        changed = np.r_[np.asarray(replaced, dtype=np.int64), np.arange(n_old, len(df))]
+
+        engine.bitmaps, engine.complete = {}, {}
+        for col in BITMAP_COLUMNS:
+            values = df[col].take(changed)
+            codes = values.cat.codes.to_numpy()
+            engine.complete[col] = self.complete[col] and bool((codes >= 0).all())
+            engine.bitmaps[col] = {}
+            for code, level in enumerate(values.cat.categories):
+                old = self.bitmaps[col].get(level)
+                hits = codes == code
+                if old is None and not hits.any():
+                    continue
+                mask = np.zeros(len(df), dtype=bool)
+                if old is not None:
+                    mask[:n_old] = np.unpackbits(old, count=n_old).view(bool)
+                mask[changed] = hits
+                if mask.any():
+                    engine.bitmaps[col][level] = np.packbits(mask)
+
+        days = df['date_detected'].take(changed).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        kept = ~np.isin(self.order, replaced)
+        order, sorted_days = self.order[kept], self.sorted_days[kept]
+        by_day = np.argsort(days, kind='stable')
+        at = np.searchsorted(sorted_days, days[by_day], side='right')
+        engine.order = np.insert(order, at, changed[by_day])
+        engine.sorted_days = np.insert(sorted_days, at, days[by_day])
+        return engine
+
+    @property
+    def nbytes(self):
+        bitmap_bytes = sum(bits.nbytes for levels in self.bitmaps.values() for bits in levels.values())
+        return bitmap_bytes + self.order.nbytes + self.sorted_days.nbytes
+
+    def _union(self, col, values):
+        levels = self.bitmaps[col]
+        # Selecting every level of a column without missing values filters nothing
+        if self.complete[col] and set(levels) <= set(values):
+            return None
+        bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for value in values:
+            if value in levels:
+                bits |= levels[value]
+        return bits
+
+    def _date_range(self, start_date, end_date):
+        lo = 0 if start_date is None else np.searchsorted(self.sorted_days, to_day_ns(start_date), 'left')
+        hi = self.n_rows if end_date is None else np.searchsorted(self.sorted_days, to_day_ns(end_date) + NS_PER_DAY, 'left')
+        if lo == 0 and hi == self.n_rows:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.order[lo:max(lo, hi)]] = True
+        return np.packbits(mask)
+
+    def select(self, state=None, start_date=None, end_date=None, severities=None, statuses=None, sizes=None):
+        parts = []
+        if state is not None:
+            parts.append(self._union('state', [state]))
+        for col, values in (('severity', severities), ('status', statuses), ('size', sizes)):
+            if values is not None:
+                parts.append(self._union(col, values))
+        parts.append(self._date_range(start_date, end_date))
+
+        bits = None
+        for part in parts:
+            if part is not None:
+                bits = part if bits is None else bits & part
+        return Selection(self.n_rows, bits)
+
+
+# Hashable form of the keyword arguments to FilterEngine.select/CountCube.select,
+# used to tell whether anything derived from a selection can be reused
+def filter_key(filters):
+    return tuple(
+        (name, tuple(sorted(value)) if isinstance(value, (list, tuple, set)) else value)
+        for name, value in sorted(filters.items())
+    )
@@ -0,0 +1,240 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from pothole_data import CATEGORY_LEVELS, PotholeDataset, as_category
+from pothole_spatial import METRES_PER_DEGREE
+
+# State (and, when the file has them, district) from each report's
+# coordinates, checked against the free-text `state` the app supplies. The
+# bundled file holds hand-simplified outlines of the 13 states and 3 federal
+# territories (coastlines drawn offshore, land borders to within ~10-20 km);
+# POTHOLE_BOUNDARIES points at any GeoJSON FeatureCollection of Polygon /
+# MultiPolygon features with a 'state' (and optional 'district') property.
+BOUNDARY_PATH = os.environ.get(
+    'POTHOLE_BOUNDARIES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'malaysia_states.geojson'))
+
+# Points in no outline but this close to one take the nearest region (coarse
+# borders leave slivers); anything further out is outside the boundaries
+OUTSIDE_TOLERANCE_M = 1_000
+
+# A disagreement is only as good as the boundary file: with the bundled
+# outlines, reports near a state border can be flagged wrongly, so states are
+# flagged by default and replaced only on request (apply=True below). A file's
+# 'accuracy_m' (the bundled one states 20 km) marks disagreements where the
+# reported state's outline is within that distance as near a border; those
+# are never replaced.
+LOCATION_CHECKS = ['OK', 'Disagrees with boundary file', 'Near a border in boundary file', 'Outside boundary file']
+
+# Spellings of the same state seen in app data, after lower-casing and
+# dropping punctuation and federal-territory prefixes
+STATE_ALIASES = {
+    'pulau pinang': 'penang',
+    'p pinang': 'penang',
+    'malacca': 'melaka',
+    'negri sembilan': 'negeri sembilan',
+    'n sembilan': 'negeri sembilan',
+    'johore': 'johor',
+    'trengganu': 'terengganu',
+    'kl': 'kuala lumpur',
+}
+STATE_PREFIXES = re.compile(r'^(wilayah persekutuan|federal territory of|wp)\s+')
+
+
+# Comparable form of a state name
+def state_key(name):
+    key = ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(name).lower()).split())
+    key = STATE_PREFIXES.sub('', key)
+    return STATE_ALIASES.get(key, key)
+
+
+# One feature of the boundary file: every ring of every polygon, as edge
+# arrays (even-odd ray casting over all rings handles holes and islands)
+class Region:
+    def __init__(self, state, district, rings):
+        self.state = state
+        self.district = district
+        points = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings]
+        start = np.concatenate([ring[:-1] for ring in points])
+        end = np.concatenate([ring[1:] for ring in points])
+        self.x1, self.y1 = start[:, 0], start[:, 1]
+        self.x2, self.y2 = end[:, 0], end[:, 1]
+        self.bbox = (start[:, 1].min(), start[:, 0].min(), start[:, 1].max(), start[:, 0].max())
+        # Shoelace area in square degrees; only used to rank regions
+        self.area = abs(float(np.sum(self.x1 * self.y2 - self.x2 * self.y1))) / 2
+
+    @property
+    def nbytes(self):
+        return self.x1.nbytes * 4
+
+    def in_bbox(self, lat, lng, margin=0.0):
+        south, west, north, east = self.bbox
+        margin_lng = margin / np.cos(np.radians(np.clip(np.abs(lat), 0, 89.0)))
+        return (lat >= south - margin) & (lat <= north + margin) & (lng >= west - margin_lng) & (lng <= east + margin_lng)
+
+    # Vectorized crossing test: one pass over the edges, each over every point
+    def contains(self, lat, lng):
+        inside = np.zeros(len(lat), dtype=bool)
+        for x1, y1, x2, y2 in zip(self.x1, self.y1, self.x2, self.y2):
+            crosses = (y1 > lat) != (y2 > lat)
+            if not crosses.any():
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_at = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+            inside ^= crosses & (lng < x_at)
+        return inside
+
+    # Distance in metres from each point to the outline (flat-earth, fine at
+    # the few-kilometre scale it is used for)
+    def distance_m(self, lat, lng):
+        scale = np.cos(np.radians(lat))
+        best = np.full(len(lat), np.inf)
+        for x1, y1, x2, y2 in zip(self.x1, self.y1, self.x2, self.y2):
+            ax, ay = (x1 - lng) * scale, y1 - lat
+            bx, by = (x2 - lng) * scale, y2 - lat
+            dx, dy = bx - ax, by - ay
+            length = dx * dx + dy * dy
+            t = np.clip(-(ax * dx + ay * dy) / np.maximum(length, 1e-18), 0, 1)
+            np.minimum(best, np.hypot(ax + t * dx, ay + t * dy), out=best)
+        return best * METRES_PER_DEGREE
+
+
+# Regions of a boundary file, its 'description' and its 'accuracy_m' (0 when
+# not stated)
+def load_boundaries(path=BOUNDARY_PATH):
+    with open(path, encoding='utf-8') as source:
+        collection = json.load(source)
+    regions = []
+    for feature in collection['features']:
+        geometry, properties = feature['geometry'], feature.get('properties') or {}
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        rings = [ring for polygon in polygons for ring in polygon]
+        regions.append(Region(properties['state'], properties.get('district'), rings))
+    return regions, collection.get('description', ''), float(collection.get('accuracy_m', 0))
+
+
+class BoundaryIndex:
+    def __init__(self, regions, tolerance_m=OUTSIDE_TOLERANCE_M, description='', accuracy_m=0.0):
+        self.description = description
+        self.accuracy_m = accuracy_m
+        # Smallest first, so enclaves (Kuala Lumpur and Putrajaya inside
+        # Selangor) win wherever outlines overlap
+        self.regions = sorted(regions, key=lambda region: region.area)
+        self.tolerance_m = tolerance_m
+        self.states = sorted({region.state for region in self.regions})
+        self.districts = sorted({region.district for region in self.regions if region.district})
+        self._state_codes = np.array([self.states.index(region.state) for region in self.regions])
+        self._district_codes = np.array([self.districts.index(region.district) if region.district else -1
+                                         for region in self.regions])
+
+    @property
+    def nbytes(self):
+        return sum(region.nbytes for region in self.regions)
+
+    # Region position per point, -1 outside every outline (and the tolerance).
+    # Each region tests only points in its bounding box not claimed yet.
+    def locate(self, lat, lng):
+        found = np.full(len(lat), -1, dtype=np.int64)
+        for i, region in enumerate(self.regions):
+            candidates = np.flatnonzero((found < 0) & region.in_bbox(lat, lng))
+            if len(candidates):
+                found[candidates[region.contains(lat[candidates], lng[candidates])]] = i
+
+        stray = np.flatnonzero(found < 0)
+        if len(stray) and self.tolerance_m > 0:
+            margin = self.tolerance_m / METRES_PER_DEGREE
+            nearest = np.full(len(stray), np.inf)
+            for i, region in enumerate(self.regions):
+                near = np.flatnonzero(region.in_bbox(lat[stray], lng[stray], margin))
+                if not len(near):
+                    continue
+                distances = region.distance_m(lat[stray][near], lng[stray][near])
+                closer = (distances <= self.tolerance_m) & (distances < nearest[near])
+                nearest[near[closer]] = distances[closer]
+                found[stray[near[closer]]] = i
+        return found
+
+    # Whether each point lies in, or within accuracy_m of, an outline of its
+    # state code (-1: no state, never near)
+    def near_state(self, lat, lng, state_codes):
+        near = np.zeros(len(lat), dtype=bool)
+        margin = self.accuracy_m / METRES_PER_DEGREE
+        for region, code in zip(self.regions, self._state_codes):
+            candidates = np.flatnonzero((state_codes == code) & ~near & region.in_bbox(lat, lng, margin))
+            if not len(candidates):
+                continue
+            lat_c, lng_c = lat[candidates], lng[candidates]
+            near[candidates] = region.contains(lat_c, lng_c) | (region.distance_m(lat_c, lng_c) <= self.accuracy_m)
+        return near
+
+    # boundary_state, boundary_district (when the boundaries have districts) and
+    # location_check for every row of df, as categoricals aligned with it
+    def check(self, df):
+        lat = df['latitude'].to_numpy(dtype=np.float64)
+        lng = df['longitude'].to_numpy(dtype=np.float64)
+        found = self.locate(lat, lng)
+        inside = found >= 0
+
+        state_codes = np.where(inside, self._state_codes[np.maximum(found, 0)], -1)
+        result = pd.DataFrame(index=df.index)
+        result['boundary_state'] = pd.Categorical.from_codes(state_codes, self.states)
+        if self.districts:
+            district_codes = np.where(inside, self._district_codes[np.maximum(found, 0)], -1)
+            result['boundary_district'] = pd.Categorical.from_codes(district_codes, self.districts)
+
+        # Supplied names are compared per category level, not per row
+        supplied = df['state'].astype('category')
+        geo_keys = np.array([state_key(state) for state in self.states] + [''], dtype=object)
+        supplied_keys = np.array([state_key(state) for state in supplied.cat.categories] + [''], dtype=object)
+        supplied_codes = supplied.cat.codes.to_numpy()
+        agrees = geo_keys[state_codes] == supplied_keys[supplied_codes]
+        checks = np.where(~inside, 3, np.where(agrees, 0, 1))
+
+        disagrees = np.flatnonzero(checks == 1)
+        if len(disagrees) and self.accuracy_m > 0:
+            key_codes = {key: code for code, key in enumerate(geo_keys[:-1])}
+            reported = np.array([key_codes.get(key, -1) for key in supplied_keys], dtype=np.int64)[supplied_codes]
+            near = self.near_state(lat[disagrees], lng[disagrees], reported[disagrees])
+            checks[disagrees[near]] = 2
+        result['location_check'] = pd.Categorical.from_codes(checks, LOCATION_CHECKS)
+        return result
+
+
+@lru_cache(maxsize=4)
+def boundary_index(path=BOUNDARY_PATH):
+    regions, description, accuracy_m = load_boundaries(path)
+    return BoundaryIndex(regions, description=description, accuracy_m=accuracy_m)
+
+
+# Copy of df with the boundary file's state (and district) and the
+# location_check flag for every row. With apply, `state` is replaced by the
+# boundary state for rows that disagree away from a border, and the app's
+# value is kept as `reported_state`.
+def locate_states(df, index=None, apply=False):
+    checks = (index or boundary_index()).check(df)
+    located = df.copy()
+    for col in checks.columns:
+        located[col] = checks[col]
+    if apply:
+        located.insert(located.columns.get_loc('state') + 1, 'reported_state', df['state'])
+        replace = (checks['location_check'] == 'Disagrees with boundary file').to_numpy()
+        state = np.where(replace, checks['boundary_state'].astype(object), df['state'].astype(object))
+        located['state'] = as_category(pd.Series(state, index=df.index), CATEGORY_LEVELS['state'])
+    return located
+
+
+def flagged_rows(located):
+    return located[(located['location_check'] != 'OK').to_numpy()]
+
+
+# Located counterpart of a dataset, cached on it like any other index
+def located_dataset(dataset, index=None, apply=False):
+    name = 'located:applied' if apply else 'located'
+
+    def build(frame):
+        return PotholeDataset(f"{dataset.key}:{name}", locate_states(frame, index, apply), dataset.rejected)
+    return dataset.artifact(name, build)
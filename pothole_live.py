@@ -0,0 +1,189 @@
+import hashlib
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from pothole_data import (REQUIRED_COLUMNS, MemoryLimitExceeded, MissingColumnsError, PotholeDataset, combine_chunks,
+                          read_pothole_csv)
+
+# Live mode: CSV files (upload format) dropped into or appended to
+# POTHOLE_LIVE_DIR are read as they grow. The latest report of a pothole_id
+# replaces the earlier one in place - a status moving New -> In Progress ->
+# Completed is a changed row, not a new one. Each refresh publishes a new
+# dataset whose count cube, filter bitmaps and user codes are updated from
+# the previous ones using only the changed rows; the other indexes (and the
+# map layers drawn from them) are rebuilt in the background as usual.
+LIVE_DIR = os.environ.get('POTHOLE_LIVE_DIR', 'pothole_live')
+LIVE_REFRESH_SECONDS = int(os.environ.get('POTHOLE_LIVE_REFRESH_SECONDS', 5))
+# Sessions polling the same directory share one feed; it is read at most this often
+LIVE_MIN_POLL_SECONDS = 1.0
+
+LIVE_COLUMNS = REQUIRED_COLUMNS + ['detected_at']
+
+# Artifacts carried over from one refresh to the next
+INCREMENTAL_ARTIFACTS = ['cube', 'filters', 'users']
+
+
+# Complete lines added to the drop directory's CSV files since the last poll.
+# A file that shrank was rewritten and is read again from the start; a
+# trailing line without its newline is left for the next poll.
+class DropTail:
+    def __init__(self, directory):
+        self.directory = directory
+        self._files = {}
+
+    def _paths(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.is_file() and entry.name.lower().endswith('.csv')]
+        # Oldest first, so a later file's report of a pothole wins
+        return [entry.path for entry in sorted(entries, key=lambda entry: (entry.stat().st_mtime_ns, entry.name))]
+
+    # (rows, rejected, errors): new valid rows of every file in arrival order,
+    # invalid ones with file and line number, and files that cannot be read
+    def poll(self):
+        frames, rejected, errors = [], [], []
+        for path in self._paths():
+            state = self._files.setdefault(path, {'offset': 0, 'header': None, 'lines': 0, 'mtime': 0})
+            stat = os.stat(path)
+            size = stat.st_size
+            if size < state['offset']:
+                state.update(offset=0, header=None, lines=0)
+            if size == state['offset']:
+                continue
+            state['mtime'] = stat.st_mtime_ns
+
+            with open(path, 'rb') as source:
+                source.seek(state['offset'])
+                data = source.read(size - state['offset'])
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                continue
+            data = data[:end]
+            if state['header'] is None:
+                split = data.index(b'\n') + 1
+                state['header'], data = data[:split], data[split:]
+                state['offset'] += split
+            if not data:
+                continue
+
+            try:
+                frame, bad = read_pothole_csv(io.BytesIO(state['header'] + data))
+            except (MissingColumnsError, MemoryLimitExceeded) as e:
+                errors.append(f"{os.path.basename(path)}: {e}")
+                # Skipped until the file is rewritten
+                state['offset'] = size
+                continue
+            state['offset'] += len(data)
+            if len(bad):
+                bad['row_number'] += state['lines']
+                bad.insert(0, 'file', os.path.basename(path))
+                rejected.append(bad)
+            state['lines'] += data.count(b'\n')
+            if len(frame):
+                frames.append(frame[LIVE_COLUMNS])
+        return frames, rejected, errors
+
+    # Identifies what has been read so far: each file's name, bytes consumed
+    # and modification time when last read
+    def fingerprint(self):
+        digest = hashlib.blake2b(digest_size=16)
+        for path, state in sorted(self._files.items()):
+            digest.update(f"{os.path.basename(path)}\0{state['offset']}\0{state['mtime']}\n".encode())
+        return digest.hexdigest()
+
+
+class LiveFeed:
+    def __init__(self, directory=LIVE_DIR):
+        self.directory = os.path.abspath(directory)
+        self.tail = DropTail(self.directory)
+        self.generation = 0
+        self.dataset = PotholeDataset(self._key(), combine_chunks([], LIVE_COLUMNS))
+        self.errors = []
+        self.last_poll = 0.0
+        self.last_change = None
+        self.last_delta = {'added': 0, 'updated': 0}
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    # Dataset keys also name on-disk exports, which outlive the process; the
+    # generation alone restarts at 0 and would repeat for different content
+    def _key(self):
+        return f"live:{self.directory}:{self.generation}:{self.tail.fingerprint()}"
+
+    # Current dataset, after reading whatever arrived since the last poll
+    def refresh(self, min_interval=LIVE_MIN_POLL_SECONDS):
+        with self._lock:
+            if time.monotonic() - self.last_poll >= min_interval:
+                self.last_poll = time.monotonic()
+                frames, rejected, errors = self.tail.poll()
+                self.errors = (self.errors + errors)[-10:]
+                if frames or rejected:
+                    self._apply(frames, rejected)
+            return self.dataset
+
+    def _apply(self, frames, rejected):
+        previous = self.dataset
+        old = previous.frame
+        n_old = len(old)
+        if rejected:
+            rejected = pd.concat([previous.rejected, *rejected], ignore_index=True)
+        else:
+            rejected = previous.rejected
+
+        replaced = np.array([], dtype=np.int64)
+        frame, removed = old, None
+        if frames:
+            incoming = combine_chunks(frames, LIVE_COLUMNS).drop_duplicates('pothole_id', keep='last')
+            ids = incoming['pothole_id'].to_numpy(dtype=object)
+            positions = np.array([self._positions.get(pothole_id, -1) for pothole_id in ids], dtype=np.int64)
+            update = positions >= 0
+            replaced = positions[update]
+            removed = old.take(replaced)
+
+            # New versions of known potholes move into their old rows; new
+            # potholes are appended
+            frame = combine_chunks([old, incoming], LIVE_COLUMNS) if n_old else incoming.reset_index(drop=True)
+            arrived = n_old + np.arange(len(incoming))
+            order = np.r_[np.arange(n_old), arrived[~update]]
+            order[replaced] = arrived[update]
+            frame = frame.take(order).reset_index(drop=True)
+            for position, pothole_id in enumerate(ids[~update], start=n_old):
+                self._positions[pothole_id] = position
+            self.last_delta = {'added': int((~update).sum()), 'updated': int(update.sum())}
+            self.last_change = pd.Timestamp.now()
+
+        self.generation += 1
+        dataset = PotholeDataset(self._key(), frame, rejected)
+        changed = frame.take(np.r_[replaced, np.arange(n_old, len(frame))])
+        incremental = {
+            'cube': lambda artifact: artifact.updated(changed, removed),
+            'filters': lambda artifact: artifact.updated(frame, replaced),
+            'users': lambda artifact: artifact.updated(frame, replaced),
+        }
+        for name in INCREMENTAL_ARTIFACTS:
+            artifact = previous.peek(name)
+            if artifact is not None and n_old:
+                dataset.artifact(name, lambda _, artifact=artifact, name=name: incremental[name](artifact))
+        self.dataset = dataset
+        # Background builds still queued for the old generation would only
+        # hold its frame until they ran
+        previous.retire()
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+# The shared feed for a directory
+def live_feed(directory=LIVE_DIR):
+    directory = os.path.abspath(directory)
+    with _feeds_lock:
+        if directory not in _feeds:
+            _feeds[directory] = LiveFeed(directory)
+        return _feeds[directory]
@@ -0,0 +1,460 @@
+import json
+
+import folium
+import numpy as np
+from folium.raster_layers import ImageOverlay
+import pandas as pd
+from branca.element import Element
+from jinja2 import Template
+
+# Marker styling shared by every map rendering mode
+COLOR_MAP = {
+    'Low': 'green',
+    'Medium': 'orange',
+    'High': 'red',
+    'Critical': 'darkred'
+}
+
+SIZE_MAP = {
+    'Small': 6,
+    'Medium': 9,
+    'Large': 12
+}
+
+DEFAULT_COLOR = 'blue'
+DEFAULT_RADIUS = 8
+
+# Coordinates are shipped as scaled integers (6 decimal places, ~0.1 m)
+COORD_SCALE = 1_000_000
+
+
+def create_base_map(df, zoom_start=10, prefer_canvas=False):
+    return folium.Map(
+        location=[df['latitude'].mean(), df['longitude'].mean()],
+        zoom_start=zoom_start,
+        tiles='OpenStreetMap',
+        prefer_canvas=prefer_canvas
+    )
+
+
+# One folium.CircleMarker + Popup per row; fine for a few hundred points
+def add_circle_markers(m, df):
+    for idx, row in df.iterrows():
+        folium.CircleMarker(
+            location=[row['latitude'], row['longitude']],
+            radius=SIZE_MAP.get(row['size'], DEFAULT_RADIUS),
+            popup=folium.Popup(f"""
+            <div style='width:250px'>
+            <b>🆔 {row['pothole_id']}</b><br>
+            <b>📍 Location:</b> {row['address']}<br>
+            <b>🏛️ State:</b> {row['state']}<br>
+            <b>⚡ Severity:</b> {row['severity']}<br>
+            <b>📏 Size:</b> {row['size']}<br>
+            <b>📊 Status:</b> {row['status']}<br>
+            <b>📅 Detected:</b> {row['date_detected'].strftime('%Y-%m-%d')} {row['time_detected']}<br>
+            <b>👤 User:</b> {row['user_id']}
+            </div>
+            """, max_width=300),
+            color=COLOR_MAP.get(row['severity'], DEFAULT_COLOR),
+            fill=True,
+            fillColor=COLOR_MAP.get(row['severity'], DEFAULT_COLOR),
+            fillOpacity=0.8,
+            weight=2
+        ).add_to(m)
+    return m
+
+
+# Categorical columns travel as small integer codes plus a lookup table
+def encode_column(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        levels = values.cat.categories
+    else:
+        codes, levels = pd.factorize(values)
+    return codes.astype(np.int64), [str(level) for level in levels]
+
+
+def encode_dates(values):
+    days = values.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    codes, levels = pd.factorize(days)
+    labels = pd.DatetimeIndex(levels).strftime('%Y-%m-%d')
+    return codes.astype(np.int64), [str(label) for label in labels]
+
+
+def build_layer_payload(df):
+    df = df[df['latitude'].notna() & df['longitude'].notna()]
+
+    state_codes, states = encode_column(df['state'])
+    severity_codes, severities = encode_column(df['severity'])
+    size_codes, sizes = encode_column(df['size'])
+    status_codes, statuses = encode_column(df['status'])
+    date_codes, dates = encode_dates(df['date_detected'])
+
+    # Styles are resolved once per category level, not once per row
+    payload = {
+        'lat': np.rint(df['latitude'].to_numpy() * COORD_SCALE).astype(np.int64).tolist(),
+        'lng': np.rint(df['longitude'].to_numpy() * COORD_SCALE).astype(np.int64).tolist(),
+        'severity': severity_codes.tolist(),
+        'size': size_codes.tolist(),
+        'state': state_codes.tolist(),
+        'status': status_codes.tolist(),
+        'date': date_codes.tolist(),
+        'id': df['pothole_id'].astype(str).tolist(),
+        'address': df['address'].astype(str).tolist(),
+        'time': df['time_detected'].astype(str).tolist(),
+        'user': df['user_id'].astype(str).tolist(),
+        'levels': {
+            'severity': severities,
+            'size': sizes,
+            'state': states,
+            'status': statuses,
+            'date': dates,
+        },
+        'colors': [COLOR_MAP.get(level, DEFAULT_COLOR) for level in severities],
+        'radii': [SIZE_MAP.get(level, DEFAULT_RADIUS) for level in sizes],
+        'scale': COORD_SCALE,
+    }
+    return json.dumps(payload, separators=(',', ':'))
+
+
+# Pre-rendered script; branca would otherwise re-compile the (large) payload as a template
+class RawScript(Element):
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+
+    def render(self, **kwargs):
+        return self.script
+
+
+# All potholes as a single GeoJSON layer. Rows are shipped column-wise and
+# expanded into a FeatureCollection in the browser; popup HTML is only built
+# when a marker is clicked.
+class PotholeLayer(folium.MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var data = {{ this.payload }};
+            var levels = data.levels;
+            var escape = function(value) {
+                return String(value === undefined ? '' : value).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            };
+            var features = new Array(data.lat.length);
+            for (var i = 0; i < data.lat.length; i++) {
+                features[i] = {
+                    type: 'Feature',
+                    geometry: {type: 'Point', coordinates: [data.lng[i] / data.scale, data.lat[i] / data.scale]},
+                    properties: {row: i}
+                };
+            }
+            var popup = function(i) {
+                return "<div style='width:250px'>" +
+                    "<b>🆔 " + escape(data.id[i]) + "</b><br>" +
+                    "<b>📍 Location:</b> " + escape(data.address[i]) + "<br>" +
+                    "<b>🏛️ State:</b> " + escape(levels.state[data.state[i]]) + "<br>" +
+                    "<b>⚡ Severity:</b> " + escape(levels.severity[data.severity[i]]) + "<br>" +
+                    "<b>📏 Size:</b> " + escape(levels.size[data.size[i]]) + "<br>" +
+                    "<b>📊 Status:</b> " + escape(levels.status[data.status[i]]) + "<br>" +
+                    "<b>📅 Detected:</b> " + escape(levels.date[data.date[i]]) + " " + escape(data.time[i]) + "<br>" +
+                    "<b>👤 User:</b> " + escape(data.user[i]) +
+                    "</div>";
+            };
+            return L.geoJSON({type: 'FeatureCollection', features: features}, {
+                pointToLayer: function(feature, latlng) {
+                    var i = feature.properties.row;
+                    var color = data.colors[data.severity[i]] || {{ this.default_color|tojson }};
+                    return L.circleMarker(latlng, {
+                        radius: data.radii[data.size[i]] || {{ this.default_radius }},
+                        color: color,
+                        fill: true,
+                        fillColor: color,
+                        fillOpacity: 0.8,
+                        weight: 2
+                    });
+                },
+                onEachFeature: function(feature, layer) {
+                    layer.bindPopup(function() { return popup(feature.properties.row); }, {maxWidth: 300});
+                }
+            });
+        })().addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, df):
+        super().__init__()
+        self._name = 'PotholeLayer'
+        self.payload = build_layer_payload(df)
+        self.default_color = DEFAULT_COLOR
+        self.default_radius = DEFAULT_RADIUS
+
+    def render(self, **kwargs):
+        script = self._template.module.__dict__['script'](self, kwargs)
+        self.get_root().script.add_child(RawScript(script), name=self.get_name())
+
+
+def build_pothole_map(df, mode='layer', zoom_start=10):
+    if mode == 'markers':
+        return add_circle_markers(create_base_map(df, zoom_start), df)
+    m = create_base_map(df, zoom_start, prefer_canvas=True)
+    PotholeLayer(df).add_to(m)
+    return m
+
+
+# Zoom-aware aggregation - the browser only receives grid cells until few
+# enough potholes are in view to draw them individually
+MAP_WIDTH = 1200
+MAP_HEIGHT = 500
+MIN_ZOOM = 3
+MAX_ZOOM = 18
+CLUSTER_CELL_PIXELS = 64
+RAW_MARKER_THRESHOLD = 2000
+
+
+def degrees_per_pixel(zoom):
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def cell_size_for_zoom(zoom, cell_pixels=CLUSTER_CELL_PIXELS):
+    return degrees_per_pixel(zoom) * cell_pixels
+
+
+def fit_view(df, width=MAP_WIDTH, height=MAP_HEIGHT):
+    lat = df['latitude'].to_numpy()
+    lng = df['longitude'].to_numpy()
+    south, north = np.nanmin(lat), np.nanmax(lat)
+    west, east = np.nanmin(lng), np.nanmax(lng)
+    spans = max((east - west) / width, (north - south) / height, 1e-9)
+    zoom = int(np.clip(np.floor(np.log2(360.0 / (256 * spans))), MIN_ZOOM, MAX_ZOOM))
+    return ((south + north) / 2, (west + east) / 2), zoom
+
+
+# Visible area for a view; equirectangular is close enough at Malaysian latitudes
+def view_bounds(center, zoom, width=MAP_WIDTH, height=MAP_HEIGHT):
+    step = degrees_per_pixel(zoom)
+    half_lat = height / 2 * step
+    half_lng = width / 2 * step
+    return center[0] - half_lat, center[1] - half_lng, center[0] + half_lat, center[1] + half_lng
+
+
+def snap_bounds(bounds, cell_size):
+    south, west, north, east = bounds
+    return (np.floor(south / cell_size - 1) * cell_size, np.floor(west / cell_size - 1) * cell_size,
+            np.ceil(north / cell_size + 1) * cell_size, np.ceil(east / cell_size + 1) * cell_size)
+
+
+def in_bounds(df, bounds):
+    south, west, north, east = bounds
+    lat = df['latitude'].to_numpy()
+    lng = df['longitude'].to_numpy()
+    return (lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)
+
+
+# Count, centroid, worst severity and dominant status per grid cell
+def aggregate_grid(df, cell_size):
+    lat = df['latitude'].to_numpy()
+    lng = df['longitude'].to_numpy()
+    row = np.floor(lat / cell_size).astype(np.int64)
+    col = np.floor(lng / cell_size).astype(np.int64)
+    cells, cell_index = np.unique((row << 32) + (col + (1 << 31)), return_inverse=True)
+    n_cells = len(cells)
+
+    count = np.bincount(cell_index, minlength=n_cells)
+    centroid_lat = np.bincount(cell_index, weights=lat, minlength=n_cells) / count
+    centroid_lng = np.bincount(cell_index, weights=lng, minlength=n_cells) / count
+
+    severity_codes, severities = encode_column(df['severity'])
+    worst = np.full(n_cells, -1, dtype=np.int64)
+    np.maximum.at(worst, cell_index, severity_codes)
+
+    status_codes, statuses = encode_column(df['status'])
+    known = status_codes >= 0
+    status_counts = np.bincount(cell_index[known] * len(statuses) + status_codes[known],
+                                minlength=n_cells * len(statuses)).reshape(n_cells, len(statuses))
+    dominant = np.where(status_counts.sum(axis=1) > 0, status_counts.argmax(axis=1), -1)
+
+    return pd.DataFrame({
+        'latitude': centroid_lat,
+        'longitude': centroid_lng,
+        'count': count,
+        'worst_severity': pd.Categorical.from_codes(worst, severities),
+        'dominant_status': pd.Categorical.from_codes(dominant, statuses),
+    })
+
+
+def build_cluster_payload(cells):
+    severity_codes, severities = encode_column(cells['worst_severity'])
+    status_codes, statuses = encode_column(cells['dominant_status'])
+    payload = {
+        'lat': np.rint(cells['latitude'].to_numpy() * COORD_SCALE).astype(np.int64).tolist(),
+        'lng': np.rint(cells['longitude'].to_numpy() * COORD_SCALE).astype(np.int64).tolist(),
+        'count': cells['count'].tolist(),
+        'severity': severity_codes.tolist(),
+        'status': status_codes.tolist(),
+        'levels': {'severity': severities, 'status': statuses},
+        'colors': [COLOR_MAP.get(level, DEFAULT_COLOR) for level in severities],
+        'scale': COORD_SCALE,
+    }
+    return json.dumps(payload, separators=(',', ':'))
+
+
+# Grid cells drawn as labelled bubbles coloured by their worst severity
+class ClusterLayer(folium.MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var data = {{ this.payload }};
+            var group = L.featureGroup();
+            for (var i = 0; i < data.lat.length; i++) {
+                var count = data.count[i];
+                var size = Math.round(24 + 8 * Math.log10(count));
+                var color = data.colors[data.severity[i]] || {{ this.default_color|tojson }};
+                var marker = L.marker([data.lat[i] / data.scale, data.lng[i] / data.scale], {
+                    icon: L.divIcon({
+                        className: '',
+                        iconSize: [size, size],
+                        html: "<div style='width:" + size + "px;height:" + size + "px;line-height:" + size + "px;" +
+                              "border-radius:50%;background:" + color + ";opacity:0.85;color:white;" +
+                              "font-weight:bold;font-size:11px;text-align:center'>" + count + "</div>"
+                    })
+                });
+                marker.bindTooltip((function(i) {
+                    return function() {
+                        return "<b>" + data.count[i] + " potholes</b><br>" +
+                            "Worst severity: " + (data.levels.severity[data.severity[i]] || '-') + "<br>" +
+                            "Mostly: " + (data.levels.status[data.status[i]] || '-') + "<br>" +
+                            "<i>Click to zoom in</i>";
+                    };
+                })(i));
+                group.addLayer(marker);
+            }
+            return group;
+        })().addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, cells):
+        super().__init__()
+        self._name = 'ClusterLayer'
+        self.payload = build_cluster_payload(cells)
+        self.default_color = DEFAULT_COLOR
+
+    def render(self, **kwargs):
+        script = self._template.module.__dict__['script'](self, kwargs)
+        self.get_root().script.add_child(RawScript(script), name=self.get_name())
+
+
+# Area a clustered view draws: the visible area padded out to whole cells
+def cluster_bounds(center, zoom):
+    return snap_bounds(view_bounds(center, zoom), cell_size_for_zoom(zoom))
+
+
+# Clusters while the view holds more than `threshold` potholes, raw markers after.
+# `visible` may hold the rows inside cluster_bounds already (e.g. from a spatial
+# index), otherwise they are picked out of `df`.
+def build_cluster_map(df, center, zoom, threshold=RAW_MARKER_THRESHOLD, visible=None):
+    cell_size = cell_size_for_zoom(zoom)
+    if visible is None:
+        visible = df[in_bounds(df, cluster_bounds(center, zoom))]
+
+    m = folium.Map(location=list(center), zoom_start=zoom, tiles='OpenStreetMap', prefer_canvas=True)
+    if len(visible) <= threshold or zoom >= MAX_ZOOM:
+        PotholeLayer(visible).add_to(m)
+        return m, {'visible': len(visible), 'cells': None}
+
+    cells = aggregate_grid(visible, cell_size)
+    ClusterLayer(cells).add_to(m)
+    return m, {'visible': len(visible), 'cells': len(cells)}
+
+
+# Density heatmap - points binned into a fixed-size raster on the server, so
+# the browser receives one small PNG whatever the number of potholes
+DENSITY_BINS = 512
+DENSITY_OPACITY = 0.75
+
+# Optional weights, following the marker styling: severity by colour rank,
+# size by marker radius relative to the smallest
+SEVERITY_WEIGHTS = {level: rank for rank, level in enumerate(COLOR_MAP, start=1)}
+SIZE_WEIGHTS = {level: radius / min(SIZE_MAP.values()) for level, radius in SIZE_MAP.items()}
+
+# Light yellow (few) to dark red (many), on a log scale
+DENSITY_RAMP = np.array([[255, 255, 178], [254, 204, 92], [253, 141, 60], [240, 59, 32], [189, 0, 38]])
+
+
+def category_weights(values, weights):
+    codes, levels = encode_column(values)
+    table = np.array([weights.get(level, 1.0) for level in levels] + [1.0], dtype=np.float64)
+    return table[codes]
+
+
+def mercator_y(lat):
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+def mercator_lat(y):
+    return np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+
+
+# 2D histogram over the points' extent. Rows are equal steps of Web Mercator y
+# (north first), so the raster lines up with the tiles without resampling.
+def density_grid(df, weighting=(), bins=DENSITY_BINS):
+    located = df['latitude'].notna().to_numpy() & df['longitude'].notna().to_numpy()
+    lat = df['latitude'].to_numpy()[located]
+    lng = df['longitude'].to_numpy()[located]
+    weights = None
+    if 'severity' in weighting:
+        weights = category_weights(df['severity'][located], SEVERITY_WEIGHTS)
+    if 'size' in weighting:
+        size = category_weights(df['size'][located], SIZE_WEIGHTS)
+        weights = size if weights is None else weights * size
+
+    y = mercator_y(lat)
+    south, north = y.min(), y.max()
+    west, east = lng.min(), lng.max()
+    # Pad so single points and straight lines still cover at least one cell
+    pad = max(north - south, np.radians(east - west), 1e-4) / bins
+    south, north, west, east = south - pad, north + pad, west - np.degrees(pad), east + np.degrees(pad)
+    n_cols = bins
+    n_rows = int(np.clip(round(bins * (north - south) / np.radians(east - west)), 1, bins))
+    # Same result as np.histogram2d with uniform bins, without its per-point binary search
+    row = np.minimum(((y - south) * (n_rows / (north - south))).astype(np.int64), n_rows - 1)
+    col = np.minimum(((lng - west) * (n_cols / (east - west))).astype(np.int64), n_cols - 1)
+    grid = np.bincount(row * n_cols + col, weights=weights, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+    return grid[::-1], ((mercator_lat(south), west), (mercator_lat(north), east))
+
+
+def density_image(grid):
+    level = np.log1p(grid) / max(np.log1p(grid.max()), 1e-12)
+    stops = np.linspace(0, 1, len(DENSITY_RAMP))
+    rgba = np.zeros(grid.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(level, stops, DENSITY_RAMP[:, channel])
+    rgba[..., 3] = np.where(grid > 0, 255, 0)
+    return rgba
+
+
+def build_density_map(df, weighting=(), bins=DENSITY_BINS):
+    grid, bounds = density_grid(df, weighting, bins)
+    (south, west), (north, east) = bounds
+    m = folium.Map(location=[(south + north) / 2, (west + east) / 2], tiles='OpenStreetMap')
+    m.fit_bounds([list(bounds[0]), list(bounds[1])])
+    ImageOverlay(density_image(grid), bounds=[list(bounds[0]), list(bounds[1])], opacity=DENSITY_OPACITY,
+                 pixelated=False, name='Pothole density').add_to(m)
+    return m, {'cells': int((grid > 0).sum()), 'shape': grid.shape, 'peak': float(grid.max())}
+
+
+# Rough footprint of a built map for cache budgeting: encoded layer payloads
+# and images, plus a flat allowance per element without one (e.g. per-row markers)
+ELEMENT_BYTES = 1_000
+
+
+def map_nbytes(m):
+    total = 0
+    pending = [m]
+    while pending:
+        element = pending.pop()
+        encoded = element.url if isinstance(element, ImageOverlay) else getattr(element, 'payload', '')
+        total += len(encoded) or ELEMENT_BYTES
+        pending.extend(element._children.values())
+    return total
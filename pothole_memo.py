@@ -0,0 +1,82 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Rendered artifacts (figures, maps, report text, exports) shared by every
+# session, keyed by dataset hash + normalized filter state + artifact name.
+# Bounded by entry count and by approximate size; least recently used first out.
+MEMO_MAX_ENTRIES = int(os.environ.get('POTHOLE_MEMO_MAX_ENTRIES', 512))
+MEMO_MAX_BYTES = int(os.environ.get('POTHOLE_MEMO_MAX_MB', 512)) * 1024 * 1024
+
+
+def approximate_size(value):
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, (tuple, list)):
+        return sum(approximate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(approximate_size(item) for item in value.values())
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    # Plotly figures: their traces' data arrays (plain lists, or numpy arrays
+    # serialized as base64 strings)
+    if hasattr(value, 'to_plotly_json'):
+        return approximate_size(value.to_plotly_json()['data'])
+    return 0
+
+
+class LRUMemo:
+    def __init__(self, max_entries=MEMO_MAX_ENTRIES, max_bytes=MEMO_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Cached value for `key`, else build() it. `size` estimates the value's
+    # footprint; values larger than the whole budget are returned uncached.
+    def get(self, key, build, size=approximate_size):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Built outside the lock; two sessions asking at once may both build
+        value = build()
+        nbytes = size(value)
+        if nbytes > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+render_memo = LRUMemo()
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Per-stage instrumentation for dashboard runs: wall time and rows in/out for
+# every stage, plus peak traced memory and payload bytes when detailed
+# profiling is on (tracemalloc slows allocation-heavy code, so it is opt-in).
+# Records go to an in-process buffer shared by all sessions for the admin
+# panel and, when POTHOLE_PERF_LOG names a file, are appended to it as JSON
+# lines (one per stage: run_id, session, user, started, stage, seconds,
+# rows_in, rows_out, peak_bytes, payload_bytes; read back with read_log).
+# POTHOLE_PERF_DETAILED=1 turns detailed profiling on for every run.
+#
+# peak_bytes is process-wide: tracemalloc counts every thread's allocations,
+# so a stage's peak includes whatever other sessions allocated meanwhile.
+PERF_LOG_PATH = os.environ.get('POTHOLE_PERF_LOG')
+PERF_DETAILED = os.environ.get('POTHOLE_PERF_DETAILED', '') == '1'
+RECENT_RECORDS = 5_000
+
+_recent = deque(maxlen=RECENT_RECORDS)
+_log_lock = threading.Lock()
+
+# tracemalloc is process-wide; it runs while any session is profiling
+_tracing_lock = threading.Lock()
+_tracing_sessions = 0
+
+
+def _start_tracing():
+    global _tracing_sessions
+    with _tracing_lock:
+        if _tracing_sessions == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_sessions += 1
+
+
+def _stop_tracing():
+    global _tracing_sessions
+    with _tracing_lock:
+        _tracing_sessions -= 1
+        if _tracing_sessions == 0:
+            tracemalloc.stop()
+
+
+class Stage:
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.payload_bytes = None
+        self.peak_bytes = None
+        self.seconds = None
+
+
+# One dashboard run; stages run one after another (they are not nested)
+class RunProfiler:
+    def __init__(self, session=None, user=None, detailed=PERF_DETAILED, log_path=PERF_LOG_PATH):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.session = session
+        self.user = user
+        self.detailed = detailed
+        self.log_path = log_path
+        self.started = datetime.now().isoformat(timespec='milliseconds')
+        self.stages = []
+        self._finished = False
+        if self.detailed:
+            _start_tracing()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        stage = Stage(name, rows_in)
+        if self.detailed:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            if self.detailed:
+                stage.peak_bytes = max(tracemalloc.get_traced_memory()[1] - base, 0)
+            self.stages.append(stage)
+
+    # Payload size is only measured when detailed, since it can mean a second serialization
+    def measure_payload(self, stage, payload):
+        if self.detailed:
+            stage.payload_bytes = payload() if callable(payload) else payload
+
+    def records(self):
+        return [{
+            'run_id': self.run_id,
+            'session': self.session,
+            'user': self.user,
+            'started': self.started,
+            'stage': stage.name,
+            'seconds': round(stage.seconds, 6),
+            'rows_in': stage.rows_in,
+            'rows_out': stage.rows_out,
+            'peak_bytes': stage.peak_bytes,
+            'payload_bytes': stage.payload_bytes,
+        } for stage in self.stages]
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.detailed:
+            _stop_tracing()
+        records = self.records()
+        _recent.extend(records)
+        if self.log_path and records:
+            lines = ''.join(json.dumps(record) + '\n' for record in records)
+            with _log_lock, open(self.log_path, 'a', encoding='utf-8') as log:
+                log.write(lines)
+
+
+def recent_records():
+    return pd.DataFrame(list(_recent))
+
+
+def read_log(path):
+    return pd.read_json(path, lines=True)
+
+
+# Per-stage latency across runs (and sessions)
+def summarize(records):
+    if records.empty:
+        return pd.DataFrame(columns=['stage', 'runs', 'median_s', 'p95_s', 'max_s', 'median_rows_in'])
+    grouped = records.groupby('stage', sort=False)
+    summary = pd.DataFrame({
+        'runs': grouped['run_id'].nunique(),
+        'median_s': grouped['seconds'].median(),
+        'p95_s': grouped['seconds'].quantile(0.95),
+        'max_s': grouped['seconds'].max(),
+        'median_rows_in': grouped['rows_in'].median(),
+    })
+    return summary.sort_values('p95_s', ascending=False).reset_index()
+
+
+# python pothole_perf.py perf.jsonl - aggregate a timing log from the command line
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python pothole_perf.py <perf log (JSON lines)>")
+    print(summarize(read_log(sys.argv[1])).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
@@ -0,0 +1,42 @@
+import pandas as pd
+
+# Text reports and tables built from a CubeSlice (see pothole_cube)
+
+
+# Everything below the "Generated:" line; depends only on the selection, so it can be memoized
+def report_sections(summary):
+    first_date, last_date = summary.date_range()
+    return f"""## Summary Statistics
+- Total Potholes: {summary.total}
+- States Covered: {summary.nunique('state')}
+- Date Range: {first_date.strftime('%Y-%m-%d')} to {last_date.strftime('%Y-%m-%d')}
+
+## Severity Breakdown
+{summary.count_by('severity').to_string()}
+
+## Status Overview  
+{summary.count_by('status').to_string()}
+
+## Top 5 States
+{summary.count_by('state').head().to_string()}
+"""
+
+
+def summary_report(sections, generated):
+    return f"""# Pothole Detection Report
+Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}
+
+{sections}"""
+
+
+# Per-state counts by severity and status, busiest state first
+def state_breakdown(summary):
+    table = pd.concat([
+        summary.count_by('state').rename('total').to_frame(),
+        summary.crosstab('state', 'severity').add_prefix('severity_'),
+        summary.crosstab('state', 'status').add_prefix('status_'),
+    ], axis=1).fillna(0).astype('int64')
+    completed = table['status_Completed'] if 'status_Completed' in table else 0
+    table['completion_rate'] = (completed / table['total']).round(3)
+    table.index.name = 'state'
+    return table.sort_values('total', ascending=False, kind='stable')
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+# Fields searched by the Data Table box, in ranking order (ID matches first)
+SEARCH_FIELDS = ['pothole_id', 'user_id', 'state', 'address']
+
+# Match quality within a field: exact < prefix < substring
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+
+# Rows of unique values turned into trigrams per batch (bounds peak memory)
+TRIGRAM_BATCH = 50_000
+
+
+def trigram_codes(data):
+    grams = np.frombuffer(data, dtype=np.uint8).astype(np.int32)
+    return np.unique((grams[:-2] << 16) | (grams[1:-1] << 8) | grams[2:])
+
+
+# CSR expansion: concatenate order[offsets[i]:offsets[i + 1]] for every i in ids
+def expand_ranges(order, offsets, ids):
+    starts = offsets[ids]
+    lengths = offsets[ids + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.array([], dtype=order.dtype), lengths
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return order[shifts + np.arange(total)], lengths
+
+
+# Trigram postings over the distinct values of one column
+class FieldIndex:
+    def __init__(self, values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        self.values = pd.Index(uniques).astype(str).str.lower().to_numpy(dtype=object)
+
+        # Unique value id -> row positions
+        codes = codes.astype(np.int64)
+        present = codes >= 0
+        self.row_order = np.flatnonzero(present)[np.argsort(codes[present], kind='stable')]
+        self.row_offsets = np.r_[0, np.cumsum(np.bincount(codes[present], minlength=len(self.values)))]
+
+        # Trigram -> unique value ids, built on a zero-padded byte matrix
+        keys = []
+        for start in range(0, len(self.values), TRIGRAM_BATCH):
+            encoded = [value.encode('utf-8') for value in self.values[start:start + TRIGRAM_BATCH]]
+            width = max(map(len, encoded), default=0)
+            if width < 3:
+                continue
+            lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+            matrix = np.array(encoded, dtype=f'S{width}').view(np.uint8).reshape(len(encoded), width).astype(np.int64)
+            grams = (matrix[:, :-2] << 16) | (matrix[:, 1:-1] << 8) | matrix[:, 2:]
+            valid = np.arange(width - 2) < (lengths[:, None] - 2)
+            ids = np.broadcast_to(np.arange(start, start + len(encoded))[:, None], grams.shape)
+            keys.append((grams[valid] << 32) | ids[valid])
+        keys = np.concatenate(keys) if keys else np.array([], dtype=np.int64)
+        keys.sort()
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+
+        grams = keys >> 32
+        self.postings = (keys & 0xFFFFFFFF).astype(np.int32)
+        self.grams, starts = np.unique(grams, return_index=True)
+        self.gram_offsets = np.r_[starts, len(grams)]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.row_order, self.row_offsets, self.postings, self.grams, self.gram_offsets))
+
+    def _candidates(self, term_bytes):
+        if len(term_bytes) < 3:
+            return np.arange(len(self.values))
+        candidates = None
+        term_grams = trigram_codes(term_bytes)
+        spans = []
+        for gram, pos in zip(term_grams, np.searchsorted(self.grams, term_grams)):
+            if pos >= len(self.grams) or self.grams[pos] != gram:
+                return np.array([], dtype=np.int64)
+            spans.append((self.gram_offsets[pos], self.gram_offsets[pos + 1]))
+        # Intersect the shortest posting lists first
+        for start, end in sorted(spans, key=lambda span: span[1] - span[0]):
+            posting = self.postings[start:end]
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+            if not len(candidates):
+                break
+        return candidates.astype(np.int64)
+
+    # Matching value ids with their match quality
+    def match(self, term):
+        candidates = self._candidates(term.encode('utf-8'))
+        if not len(candidates):
+            return candidates, candidates
+        values = pd.Series(self.values[candidates])
+        hits = values.str.contains(term, regex=False).to_numpy()
+        quality = np.where(values.str.startswith(term).to_numpy(), PREFIX, SUBSTRING)
+        quality[(values == term).to_numpy()] = EXACT
+        return candidates[hits], quality[hits]
+
+    def rows(self, value_ids):
+        return expand_ranges(self.row_order, self.row_offsets, value_ids)
+
+
+class SearchIndex:
+    def __init__(self, df, fields=SEARCH_FIELDS):
+        self.n_rows = len(df)
+        self.fields = {field: FieldIndex(df[field]) for field in fields}
+
+    @property
+    def nbytes(self):
+        return sum(index.nbytes for index in self.fields.values())
+
+    # Matching row positions, best first: by field (ID before address), then
+    # by match quality, then by original row order
+    def search(self, term, selection=None):
+        term = term.strip().lower()
+        if not term:
+            return selection.rows() if selection is not None else np.arange(self.n_rows)
+
+        rows, scores = [], []
+        for priority, index in enumerate(self.fields.values()):
+            value_ids, quality = index.match(term)
+            field_rows, counts = index.rows(value_ids)
+            rows.append(field_rows)
+            scores.append(np.repeat(priority * 3 + quality, counts))
+        rows = np.concatenate(rows)
+        scores = np.concatenate(scores)
+
+        if selection is not None and not selection.all:
+            keep = selection.contains(rows)
+            rows, scores = rows[keep], scores[keep]
+
+        # Best score per row, then rank
+        order = np.lexsort((scores, rows))
+        rows, scores = rows[order], scores[order]
+        first = np.r_[True, rows[1:] != rows[:-1]] if len(rows) else np.array([], dtype=bool)
+        rows, scores = rows[first], scores[first]
+        return rows[np.lexsort((rows, scores))]
+
+
+# Same matches and ranking as SearchIndex.search, found by scanning the
+# selected rows; used while the index is still being built
+def scan_search(df, term, selection=None, fields=SEARCH_FIELDS):
+    rows = selection.rows() if selection is not None else np.arange(len(df))
+    term = term.strip().lower()
+    if not term:
+        return rows
+
+    no_match = np.iinfo(np.int64).max
+    best = np.full(len(rows), no_match, dtype=np.int64)
+    for priority, field in enumerate(fields):
+        values = df[field].take(rows)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Match each distinct value once, then look the codes up
+            codes = values.cat.codes.to_numpy()
+            values = pd.Series(values.cat.categories).astype(str).str.lower()
+        else:
+            codes = None
+            values = values.astype(str).str.lower()
+        quality = np.where(values.str.contains(term, regex=False).to_numpy(), SUBSTRING, no_match)
+        quality[values.str.startswith(term).to_numpy()] = PREFIX
+        quality[(values == term).to_numpy()] = EXACT
+        if codes is not None:
+            quality = np.r_[quality, no_match][codes]
+        score = np.where(quality == no_match, no_match, priority * 3 + quality)
+        best = np.minimum(best, score)
+
+    hits = best < no_match
+    rows, best = rows[hits], best[hits]
+    return rows[np.lexsort((rows, best))]
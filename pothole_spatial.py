@@ -0,0 +1,131 @@
+import numpy as np
+
+# Uniform lat/lng grid over every located pothole. Rows are sorted by cell
+# (cell id = grid row * columns + grid column), so the cells of one grid row
+# that fall inside a box are a single contiguous slice of the sorted arrays.
+# Box, radius and nearest-neighbour queries read only those slices.
+EARTH_RADIUS_M = 6_371_008.8
+METRES_PER_DEGREE = np.pi * EARTH_RADIUS_M / 180
+
+# ~1.1 km cells; coarser when the data spans so much that the grid would
+# exceed MAX_CELLS (the offsets array holds one entry per cell)
+CELL_DEGREES = 0.01
+MAX_CELLS = 4_000_000
+
+
+# Great-circle distance in metres; lat/lng in degrees, arrays broadcast
+def haversine_m(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# Box around a point that contains every point within `metres` of it
+def radius_bounds(lat, lng, metres):
+    dlat = metres / METRES_PER_DEGREE
+    coslat = np.cos(np.radians(min(abs(lat) + dlat, 89.9)))
+    dlng = metres / (METRES_PER_DEGREE * coslat)
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+class SpatialIndex:
+    def __init__(self, df, cell_degrees=CELL_DEGREES):
+        lat = df['latitude'].to_numpy(dtype=np.float64)
+        lng = df['longitude'].to_numpy(dtype=np.float64)
+        located = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng))
+        lat, lng = lat[located], lng[located]
+
+        if len(located):
+            self.origin = (lat.min(), lng.min())
+            span_lat, span_lng = lat.max() - self.origin[0], lng.max() - self.origin[1]
+        else:
+            self.origin, span_lat, span_lng = (0.0, 0.0), 0.0, 0.0
+        self.cell = max(cell_degrees, np.sqrt(span_lat * span_lng / MAX_CELLS))
+        self.n_grid_rows = int(span_lat // self.cell) + 1
+        self.n_grid_cols = int(span_lng // self.cell) + 1
+
+        cells = self._cell_row(lat) * self.n_grid_cols + self._cell_col(lng)
+        order = np.argsort(cells, kind='stable')
+        self.rows = located[order]
+        self.lat = lat[order]
+        self.lng = lng[order]
+        self.offsets = np.r_[0, np.cumsum(np.bincount(cells, minlength=self.n_grid_rows * self.n_grid_cols))]
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.lat.nbytes + self.lng.nbytes + self.offsets.nbytes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _cell_row(self, lat):
+        return np.clip(((lat - self.origin[0]) // self.cell).astype(np.int64), 0, self.n_grid_rows - 1)
+
+    def _cell_col(self, lng):
+        return np.clip(((lng - self.origin[1]) // self.cell).astype(np.int64), 0, self.n_grid_cols - 1)
+
+    # Positions in the sorted arrays of every point in cells touching the box
+    def _candidates(self, south, west, north, east):
+        if not len(self.rows) or south > north or west > east:
+            return np.array([], dtype=np.int64)
+        grid_rows = np.arange(self._cell_row(np.float64(south)), self._cell_row(np.float64(north)) + 1)
+        first = grid_rows * self.n_grid_cols
+        starts = self.offsets[first + self._cell_col(np.float64(west))]
+        ends = self.offsets[first + self._cell_col(np.float64(east)) + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.array([], dtype=np.int64)
+        return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+
+    def _keep_selected(self, positions, selection):
+        if selection is None or selection.all or not len(positions):
+            return positions
+        return positions[selection.contains(self.rows[positions])]
+
+    # Row positions inside the box (south, west, north, east), in grid order
+    def bbox(self, bounds, selection=None):
+        south, west, north, east = bounds
+        positions = self._candidates(south, west, north, east)
+        lat, lng = self.lat[positions], self.lng[positions]
+        positions = positions[(lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)]
+        return self.rows[self._keep_selected(positions, selection)]
+
+    # Row positions within `metres` of a point and their distances, nearest first
+    def within(self, lat, lng, metres, selection=None):
+        positions = self._keep_selected(self._candidates(*radius_bounds(lat, lng, metres)), selection)
+        distances = haversine_m(lat, lng, self.lat[positions], self.lng[positions])
+        keep = distances <= metres
+        positions, distances = positions[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return self.rows[positions[order]], distances[order]
+
+    # The k nearest row positions and their distances, nearest first. The
+    # search radius starts at one cell and doubles until k points are inside
+    # it - everything outside that circle is further away than what was found.
+    # Points off the grid start from their distance to its edge; once the
+    # circle would cover the whole grid, every point is measured.
+    def nearest(self, lat, lng, k=1, selection=None):
+        south, west = self.origin
+        edge = haversine_m(lat, lng, np.clip(lat, south, south + self.n_grid_rows * self.cell),
+                           np.clip(lng, west, west + self.n_grid_cols * self.cell))
+        radius = max(self.cell * METRES_PER_DEGREE, 2 * edge)
+        extent = max(self.n_grid_rows, self.n_grid_cols) * self.cell * METRES_PER_DEGREE
+        while radius < extent:
+            rows, distances = self.within(lat, lng, radius, selection)
+            if len(rows) >= k:
+                return rows[:k], distances[:k]
+            radius *= 2
+        positions = self._keep_selected(np.arange(len(self.rows)), selection)
+        distances = haversine_m(lat, lng, self.lat[positions], self.lng[positions])
+        order = np.argsort(distances, kind='stable')[:max(k, 0)]
+        return self.rows[positions[order]], distances[order]
+
+
+# Same result as SpatialIndex.within (or nearest, with metres=inf and [:k]) by
+# measuring every row in `rows`; used while the index is still being built
+def scan_within(df, lat, lng, metres, rows):
+    distances = haversine_m(lat, lng, df['latitude'].to_numpy()[rows], df['longitude'].to_numpy()[rows])
+    keep = np.flatnonzero(distances <= metres)
+    keep = keep[np.argsort(distances[keep], kind='stable')]
+    return rows[keep], distances[keep]
@@ -0,0 +1,156 @@
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from pothole_data import (CATEGORY_LEVELS, COMPACT_CATEGORY_COLUMNS, REQUIRED_COLUMNS, PotholeDataset, as_category,
+                          cached_dataset, combine_chunks)
+
+# Local Parquet store of every accepted report, partitioned by state and month
+# (state=<name>/month=YYYY-MM/). Uploads are merged in by rewriting only the
+# partitions they touch; the latest report of a pothole_id replaces older ones.
+STORE_DIR = os.environ.get('POTHOLE_STORE_DIR', 'pothole_store')
+
+PARTITION_SCHEMA = pa.schema([('state', pa.string()), ('month', pa.string())])
+STORE_SCHEMA = pa.schema([
+    ('pothole_id', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('state', pa.string()),
+    ('address', pa.string()),
+    ('size', pa.string()),
+    ('severity', pa.string()),
+    ('date_detected', pa.timestamp('us')),
+    ('time_detected', pa.string()),
+    ('user_id', pa.string()),
+    ('status', pa.string()),
+    ('detected_at', pa.timestamp('us')),
+    ('month', pa.string()),
+])
+STORE_COLUMNS = REQUIRED_COLUMNS + ['detected_at']
+
+# Rows per Parquet row group within a partition file
+ROW_GROUP_ROWS = 64_000
+
+
+def both(expr, part):
+    return part if expr is None else expr & part
+
+
+def partition_filter(states=None, months=None):
+    expr = None
+    for field, values in (('state', states), ('month', months)):
+        if values is not None:
+            expr = both(expr, ds.field(field).isin(list(values)))
+    return expr
+
+
+class PotholeStore:
+    def __init__(self, path=STORE_DIR):
+        self.path = os.path.abspath(path)
+        # Memory-mapped reads: partitions are paged in by the OS instead of copied
+        self.filesystem = pafs.LocalFileSystem(use_mmap=True)
+        self.partitioning = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+    def _files(self):
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                if name.endswith('.parquet'):
+                    yield os.path.join(root, name)
+
+    def _dataset(self):
+        files = sorted(self._files())
+        if not files:
+            return None
+        return ds.dataset(files, schema=STORE_SCHEMA, format='parquet', filesystem=self.filesystem,
+                          partitioning=self.partitioning, partition_base_dir=self.path)
+
+    # Changes whenever any partition file is written; used as the cache key
+    def version(self):
+        digest = hashlib.blake2b(digest_size=16)
+        for path in sorted(self._files()):
+            stat = os.stat(path)
+            digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+        return digest.hexdigest()
+
+    # Rows per (state, month) partition, read from Parquet footers only
+    def partitions(self):
+        dataset = self._dataset()
+        records = []
+        if dataset is not None:
+            for fragment in dataset.get_fragments():
+                keys = ds.get_partition_keys(fragment.partition_expression)
+                records.append((keys['state'], keys['month'], fragment.count_rows()))
+        table = pd.DataFrame(records, columns=['state', 'month', 'rows'])
+        return table.groupby(['state', 'month'], as_index=False)['rows'].sum()
+
+    # Only the partitions (and row groups) matching the filters are read
+    def read(self, states=None, months=None):
+        dataset = self._dataset()
+        if dataset is None:
+            return combine_chunks([], REQUIRED_COLUMNS)
+        table = dataset.to_table(columns=STORE_COLUMNS, filter=partition_filter(states, months))
+        df = table.to_pandas(categories=COMPACT_CATEGORY_COLUMNS)
+        # Arrow keeps dictionary values in the order they were met; sort them so
+        # codes order like the values, as for uploads
+        for col in COMPACT_CATEGORY_COLUMNS:
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+        for col, levels in CATEGORY_LEVELS.items():
+            df[col] = as_category(df[col], levels)
+        return df
+
+    # Merge validated rows into the store. Rows of the upload replace stored
+    # rows with the same pothole_id; within an upload the last row wins.
+    def append(self, df):
+        incoming = pd.DataFrame({col: df[col] for col in STORE_COLUMNS})
+        for col in COMPACT_CATEGORY_COLUMNS:
+            incoming[col] = incoming[col].astype(str)
+        incoming['month'] = incoming['date_detected'].dt.strftime('%Y-%m')
+        incoming = incoming.drop_duplicates('pothole_id', keep='last')
+
+        # Partitions touched: where the new rows go, plus wherever older
+        # versions of the same potholes currently live
+        affected = set(zip(incoming['state'], incoming['month']))
+        dataset = self._dataset()
+        stored = None
+        replaced = 0
+        if dataset is not None:
+            ids = dataset.to_table(columns=['pothole_id', 'state', 'month'],
+                                   filter=ds.field('pothole_id').isin(incoming['pothole_id'].tolist()))
+            replaced = ids.num_rows
+            affected |= set(zip(ids['state'].to_pylist(), ids['month'].to_pylist()))
+
+            states, months = zip(*affected)
+            stored = dataset.to_table(columns=list(STORE_SCHEMA.names),
+                                      filter=partition_filter(set(states), set(months))).to_pandas()
+            in_affected = pd.Series(list(zip(stored['state'], stored['month'])), dtype=object).isin(affected)
+            stored = stored[in_affected.to_numpy()]
+
+        merged = incoming if stored is None else pd.concat([stored, incoming], ignore_index=True)
+        merged = merged.drop_duplicates('pothole_id', keep='last')
+
+        # Partitions whose every row moved elsewhere would not be overwritten below
+        emptied = affected - set(zip(merged['state'], merged['month']))
+        if dataset is not None:
+            for state, month in emptied:
+                for fragment in dataset.get_fragments(filter=partition_filter([state], [month])):
+                    os.remove(fragment.path)
+
+        table = pa.Table.from_pandas(merged, schema=STORE_SCHEMA, preserve_index=False)
+        os.makedirs(self.path, exist_ok=True)
+        ds.write_dataset(table, self.path, format='parquet', partitioning=self.partitioning,
+                         basename_template='part-{i}.parquet', existing_data_behavior='delete_matching',
+                         max_rows_per_group=ROW_GROUP_ROWS)
+        return {'rows': len(incoming), 'replaced': replaced, 'partitions': len(affected)}
+
+
+# Dataset over one slice of the store, shared through the dataset cache until
+# the store is written again
+def load_store_dataset(store, states=None, months=None, session=None):
+    wanted = repr((sorted(states) if states is not None else None, sorted(months) if months is not None else None))
+    key = 'store:' + hashlib.blake2b(f'{store.path}:{store.version()}:{wanted}'.encode(), digest_size=16).hexdigest()
+    return cached_dataset(key, lambda key: PotholeDataset(key, store.read(states=states, months=months)),
+                          session=session)
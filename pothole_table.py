@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# Paged Data Table - only the visible page is formatted and sent to the browser
+PAGE_SIZES = [25, 50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 50
+
+DATE_FORMATS = {
+    'date_detected': '%Y-%m-%d',
+    'detected_at': '%Y-%m-%d %H:%M',
+}
+
+
+# Stable ascending order of a whole column; missing values sort last
+def sort_order(df, column):
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy().astype(np.int64)
+    elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return np.argsort(values.to_numpy(), kind='stable')
+    else:
+        codes = pd.factorize(values, sort=True)[0].astype(np.int64)
+    codes[codes < 0] = codes.max() + 1 if len(codes) else 0
+    return np.argsort(codes, kind='stable')
+
+
+# Keep the rows of `order` that are in the current selection/search result
+def restrict_order(order, rows=None, selection=None):
+    if rows is not None:
+        keep = np.zeros(len(order), dtype=bool)
+        keep[rows] = True
+        return order[keep[order]]
+    if selection is None or selection.all:
+        return order
+    return order[selection.contains(order)]
+
+
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def page_slice(ordered_rows, page, page_size):
+    start = (page - 1) * page_size
+    return ordered_rows[start:start + page_size]
+
+
+# Vectorized formatting of the visible slice only
+def format_page(page_df):
+    page_df = page_df.copy()
+    for column, fmt in DATE_FORMATS.items():
+        if column in page_df:
+            page_df[column] = page_df[column].dt.strftime(fmt)
+    return page_df